@@ -3,6 +3,7 @@ import styled from 'styled-components';
 import nipplejs from 'nipplejs';
 import { Icon } from '@mdi/react';
 import { mdiMicrophone, mdiMicrophoneOff } from '@mdi/js';
+import { getSessionId } from '../session';
 
 const ControlsContainer = styled.div`
   display: flex;
@@ -117,7 +118,8 @@ const Controls = ({ onJoystickMove, onMicToggle }) => {
                 'Accept': 'application/json'
               },
               body: JSON.stringify({
-                audio: reader.result
+                audio: reader.result,
+                session_id: getSessionId()
               })
             });
 
@@ -158,24 +160,22 @@ const Controls = ({ onJoystickMove, onMicToggle }) => {
     }
   };
   
-  // Add function to send commands to Raspberry Pi
-  const sendMoveCommand = async (direction, speed) => {
-    console.log('sending move command')
-    console.log(direction, speed)
+  // Send the raw joystick vector to the Raspberry Pi, which mixes it into wheel speeds
+  const sendDriveCommand = async (x, y) => {
     try {
-      const response = await fetch('http://10.19.179.61:5000/move', {
+      const response = await fetch('http://10.19.179.61:5000/drive', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ direction, speed })
+        body: JSON.stringify({ x, y })
       });
 
       if (!response.ok) {
-        throw new Error('Failed to send movement command');
+        throw new Error('Failed to send drive command');
       }
     } catch (error) {
-      console.error('Movement command error:', error);
+      console.error('Drive command error:', error);
       setStatus('Error controlling robot');
     }
   };
@@ -217,28 +217,10 @@ const Controls = ({ onJoystickMove, onMicToggle }) => {
         // Start interval if not already started
         if (!moveInterval) {
           moveInterval = setInterval(() => {
-            // Calculate direction and speed based on vector
+            // Invert Y since joystick Y is inverted; the Pi handles the deadband
             const x = currentVector.x;
-            const y = -currentVector.y; // Invert Y since joystick Y is inverted
-            
-            // Calculate speed (0-100) based on distance from center
-            const speed = Math.min(Math.sqrt(x * x + y * y) * 100, 100);
-            
-            // Determine direction based on vector components and speed
-            let direction;
-            if (speed <= 10) {
-              direction = 'center';
-            } else if (Math.abs(x) > Math.abs(y)) {
-              // Horizontal movement is stronger
-              direction = x > 0 ? 'right' : 'left';
-            } else {
-              // Vertical movement is stronger
-              direction = y > 0 ? 'forward' : 'backward';
-            }
-
-            // Send movement command
-            sendMoveCommand(direction, Math.round(speed));
-            console.log('sending move command:', direction, Math.round(speed));
+            const y = -currentVector.y;
+            sendDriveCommand(x, y);
           }, 100); // Send commands every 100ms
         }
       });
@@ -250,7 +232,7 @@ const Controls = ({ onJoystickMove, onMicToggle }) => {
           moveInterval = null;
         }
         currentVector = { x: 0, y: 0 };
-        sendMoveCommand('stop', 0);
+        sendDriveCommand(0, 0);
       });
     }
 
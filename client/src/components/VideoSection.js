@@ -1,5 +1,6 @@
 import React, { useEffect, useRef, useState } from 'react';
 import styled from 'styled-components';
+import { getSessionId } from '../session';
 
 const VideoContainer = styled.div`
   width: 100%;
@@ -66,7 +67,7 @@ const VideoSection = () => {
 
   // Listen for new video events from the server
   useEffect(() => {
-    const eventSource = new EventSource('http://localhost:5001/video-stream');
+    const eventSource = new EventSource(`http://localhost:5001/video-stream?session_id=${encodeURIComponent(getSessionId())}`);
     
     console.log('eventSource:', eventSource);
     eventSource.onmessage = (event) => {
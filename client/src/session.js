@@ -0,0 +1,12 @@
+// Identifies this browser tab to the server so each operator gets their own
+// conversation context and lip-sync video stream.
+export function getSessionId() {
+  let sessionId = sessionStorage.getItem('sessionId');
+  if (!sessionId) {
+    sessionId = window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem('sessionId', sessionId);
+  }
+  return sessionId;
+}
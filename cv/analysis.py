@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+
+OBJECTS_PROMPT = """Please analyze this image and provide a list of all visible objects.
+                               Return only the objects, one per line, without any additional text or numbers.
+                               Be specific but concise."""
+
+
+def parse_objects(text: str) -> List[str]:
+    """Splits a one-object-per-line reply, dropping blanks and duplicates while preserving order."""
+    seen = set()
+    objects = []
+    for obj in text.split('\n'):
+        obj = obj.strip()
+        if obj and obj not in seen:
+            seen.add(obj)
+            objects.append(obj)
+    return objects
+
+
+class GeminiVisionClient:
+    """Lists the objects in a BGR frame with a Gemini GenerativeModel."""
+
+    def __init__(self, model, prompt: str = OBJECTS_PROMPT):
+        self.model = model
+        self.prompt = prompt
+
+    def list_objects(self, frame: np.ndarray) -> List[str]:
+        # Convert frame to PIL Image
+        pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        response = self.model.generate_content([self.prompt, pil_image])
+        return parse_objects(response.text)
+
+
+class FakeVisionClient:
+    """Stands in for GeminiVisionClient offline: sleeps for latency seconds and returns objects."""
+
+    def __init__(self, latency: float = 1.0, objects: Optional[List[str]] = None):
+        self.latency = latency
+        self.objects = objects or ["a bottle", "a notebook"]
+        self.calls = 0
+
+    def list_objects(self, frame: np.ndarray) -> List[str]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return list(self.objects)
+
+
+class AnalysisResult:
+    __slots__ = ('seq', 'captured_at', 'finished_at', 'value', 'error')
+
+    def __init__(self, seq, captured_at, finished_at, value=None, error=None):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.finished_at = finished_at
+        self.value = value
+        self.error = error
+
+    @property
+    def age(self):
+        """Seconds from frame capture to result."""
+        return self.finished_at - self.captured_at
+
+
+class AnalysisScheduler:
+    """
+    Runs a slow per-frame analysis on worker threads without stalling the
+    capture loop.
+
+    The capture loop calls offer() with every frame it reads. A frame is
+    submitted only if fewer than max_in_flight analyses are running and at
+    least interval seconds have passed since the last submission; otherwise
+    it is skipped, so whenever a slot frees up the next submission is the
+    newest frame. The interval counts from submission to submission, not
+    from when the previous analysis finished.
+
+    Results (including failures) are put on the results queue and passed to
+    on_result, if given, from the worker thread.
+    """
+
+    def __init__(self, analyze: Callable, max_in_flight: int = 1, interval: float = 0.0,
+                 on_result: Optional[Callable] = None):
+        self.analyze = analyze
+        self.max_in_flight = max_in_flight
+        self.interval = interval
+        self.on_result = on_result
+        self.results = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='analysis')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_submit = None
+        self._seq = 0
+        self.submitted = 0
+        self.skipped = 0
+        self.completed = 0
+        self.failed = 0
+
+    def offer(self, frame, captured_at: Optional[float] = None) -> bool:
+        """Submits frame if a slot is free and the interval has passed. Returns True if submitted."""
+        now = time.monotonic()
+        with self._lock:
+            if self._in_flight >= self.max_in_flight or (
+                    self._last_submit is not None and now - self._last_submit < self.interval):
+                self.skipped += 1
+                return False
+            self._in_flight += 1
+            self._last_submit = now
+            self._seq += 1
+            seq = self._seq
+            self.submitted += 1
+        self._executor.submit(self._run, seq, frame, captured_at if captured_at is not None else now)
+        return True
+
+    def _run(self, seq, frame, captured_at):
+        try:
+            result = AnalysisResult(seq, captured_at, None, value=self.analyze(frame))
+        except Exception as e:
+            result = AnalysisResult(seq, captured_at, None, error=e)
+        result.finished_at = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if result.error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self.results.put(result)
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                print(f"Error in analysis callback: {str(e)}")
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'skipped_frames': self.skipped,
+                'completed': self.completed,
+                'failed': self.failed,
+                'in_flight': self._in_flight,
+            }
@@ -0,0 +1,98 @@
+"""
+Capture-loop benchmark for the Gemini analysis scheduler, using
+FakeVisionClient so no camera, network or API key is needed.
+
+    python -m cv.bench_analysis --latency 1.5 --interval 0.5 --in-flight 1 2 4
+
+Frames are produced at --fps. "blocking" is the old loop, which calls the
+vision client inline whenever the interval has passed; the scheduler runs
+are capture_and_analyze's AnalysisScheduler with N analyses in flight.
+For each run it reports analyses completed, the frame rate the capture
+loop actually kept, its longest stall, and how old each frame was when
+its result arrived.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from cv.analysis import AnalysisScheduler, FakeVisionClient
+
+
+def frame_source(fps):
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    period = 1.0 / fps
+    next_frame = time.monotonic()
+    while True:
+        # Like cap.read(): blocks until the camera has the next frame
+        delay = next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        next_frame = max(next_frame + period, time.monotonic())
+        yield frame
+
+
+def run_blocking(client, args):
+    frames, ages, gaps = 0, [], []
+    last_analysis = 0.0
+    deadline = time.monotonic() + args.duration
+    previous = None
+    for frame in frame_source(args.fps):
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if previous is not None:
+            gaps.append(now - previous)
+        previous = now
+        frames += 1
+        if now - last_analysis >= args.interval:
+            client.list_objects(frame)
+            ages.append(time.monotonic() - now)
+            last_analysis = time.monotonic()
+    return frames, ages, gaps
+
+
+def run_scheduler(client, args, in_flight):
+    frames, ages, gaps = 0, [], []
+    scheduler = AnalysisScheduler(client.list_objects, max_in_flight=in_flight, interval=args.interval)
+    deadline = time.monotonic() + args.duration
+    previous = None
+    for frame in frame_source(args.fps):
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if previous is not None:
+            gaps.append(now - previous)
+        previous = now
+        frames += 1
+        scheduler.offer(frame, captured_at=now)
+        while not scheduler.results.empty():
+            ages.append(scheduler.results.get_nowait().age)
+    scheduler.close(wait=False)
+    return frames, ages, gaps
+
+
+def report(name, frames, ages, gaps, duration):
+    mean_age = f"{statistics.mean(ages):.2f}s" if ages else "n/a"
+    print(f"{name:>12}: {len(ages):3d} analyses  capture {frames / duration:5.1f} fps  "
+          f"longest stall {max(gaps) * 1000:7.1f} ms  mean result age {mean_age}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=1.5, help='seconds per fake vision call')
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between analysis submissions')
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--in-flight', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    report('blocking', *run_blocking(FakeVisionClient(args.latency), args), args.duration)
+    for in_flight in args.in_flight:
+        report(f'{in_flight} in flight', *run_scheduler(FakeVisionClient(args.latency), args, in_flight),
+               args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+CPU benchmarks for the OwlViT detector.
+
+    python -m cv.bench_detector text-cache --frames 20
+
+text-cache: per-frame latency of the original processor(text=..., images=...)
+            + model(**inputs) call versus OwlViTDetector with cached query
+            embeddings.
+batch:      detect_batch() throughput in frames/sec at several batch sizes
+            (--batch-sizes, default 1 4 8).
+backends:   latency of each inference backend (--backends, default eager
+            int8 onnx) and how far its detections drift from eager fp32:
+            recall of the eager boxes (same label, IoU >= 0.5), mean IoU and
+            mean score difference of the matched boxes.
+preprocess: BGR frame to pixel_values via cv2.cvtColor + PIL + the HF
+            processor versus FramePreprocessor, with tracemalloc peak
+            memory and retained allocations per frame, and with a 384x384 ROI.
+
+Images come from --images (any files PIL can open); without it a fixed
+synthetic 1280x720 frame is used, which is fine for latency but not for
+accuracy comparisons.
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import cv2
+
+import numpy as np
+import torch
+from PIL import Image
+
+from cv.detector import BACKENDS, OwlViTDetector
+from cv.preprocess import FramePreprocessor
+from cv.tracking import box_iou
+
+QUERIES = ["a bottle", "a notebook"]
+
+
+def load_images(paths):
+    if paths:
+        return [Image.open(path).convert("RGB") for path in paths]
+    rng = np.random.default_rng(0)
+    return [Image.fromarray(rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8))]
+
+
+def time_per_frame(fn, images, frames, warmup=2):
+    for i in range(warmup):
+        fn(images[i % len(images)])
+    samples = []
+    for i in range(frames):
+        start = time.perf_counter()
+        fn(images[i % len(images)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, samples):
+    print(f"{name:>24}: mean={statistics.mean(samples):8.1f} ms  median={statistics.median(samples):8.1f} ms")
+
+
+def bench_text_cache(detector, images, args):
+    processor, model = detector.processor, detector.model
+    texts = [QUERIES]
+
+    def uncached(image):
+        # What the follow loop used to do on every frame
+        inputs = processor(text=texts, images=image, return_tensors="pt")
+        outputs = model(**inputs)
+        target_sizes = torch.Tensor([image.size[::-1]])
+        return processor.image_processor.post_process_object_detection(
+            outputs=outputs, target_sizes=target_sizes, threshold=detector.threshold
+        )
+
+    detector.set_queries(QUERIES)
+    before = time_per_frame(uncached, images, args.frames)
+    after = time_per_frame(detector.detect, images, args.frames)
+    report("text + image every frame", before)
+    report("cached text embeddings", after)
+    print(f"{'speedup':>24}: {statistics.median(before) / statistics.median(after):.2f}x")
+
+
+def bench_batch(detector, images, args):
+    detector.set_queries(QUERIES)
+    for batch_size in args.batch_sizes:
+        batch = [images[i % len(images)] for i in range(batch_size)]
+        detector.detect_batch(batch)  # warm-up
+        start = time.perf_counter()
+        for _ in range(args.batches):
+            detector.detect_batch(batch)
+        elapsed = time.perf_counter() - start
+        fps = batch_size * args.batches / elapsed
+        print(f"batch size {batch_size:>2}: {fps:6.2f} frames/s  ({elapsed / args.batches * 1000:8.1f} ms per batch)")
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """Greedily matches each reference box to the best unused candidate box with the same label."""
+    ref_boxes, ref_scores, ref_labels = (reference[k].tolist() for k in ("boxes", "scores", "labels"))
+    cand_boxes, cand_scores, cand_labels = (candidate[k].tolist() for k in ("boxes", "scores", "labels"))
+    used = set()
+    matches = []
+    for box, score, label in zip(ref_boxes, ref_scores, ref_labels):
+        best, best_iou = None, iou_threshold
+        for j, (other, other_label) in enumerate(zip(cand_boxes, cand_labels)):
+            if j in used or other_label != label:
+                continue
+            iou = box_iou(box, other)
+            if iou >= best_iou:
+                best, best_iou = j, iou
+        if best is not None:
+            used.add(best)
+            matches.append((best_iou, abs(score - cand_scores[best])))
+    return len(ref_boxes), matches
+
+
+def bench_backends(detector, images, args):
+    # The eager detector passed in is the accuracy reference; int8 quantizes
+    # its model in place, so every other backend gets a freshly loaded copy.
+    detector.set_queries(QUERIES)
+    reference = [detector.detect(image) for image in images]
+    for name in args.backends:
+        candidate = detector if name == "eager" else OwlViTDetector(backend=name)
+        candidate.set_queries(QUERIES)
+        samples = time_per_frame(candidate.detect, images, args.frames)
+        total, matches = 0, []
+        for image, expected in zip(images, reference):
+            count, matched = compare_detections(expected, candidate.detect(image))
+            total += count
+            matches.extend(matched)
+        report(name, samples)
+        if total:
+            ious = [iou for iou, _ in matches] or [0.0]
+            deltas = [delta for _, delta in matches] or [0.0]
+            print(f"{'':>24}  recall={len(matches) / total:6.1%}  mean IoU={statistics.mean(ious):.3f}"
+                  f"  mean |score diff|={statistics.mean(deltas):.4f}  ({total} eager boxes)")
+        else:
+            print(f"{'':>24}  no eager detections to compare against; pass real --images")
+
+
+def allocations_per_frame(fn, frame, frames):
+    """Peak traced bytes above baseline, and blocks still allocated afterwards, per frame."""
+    fn(frame)  # first call allocates any reusable buffers
+    tracemalloc.start()
+    peaks, blocks = [], 0
+    for _ in range(frames):
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn(frame)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        after = tracemalloc.take_snapshot()
+        blocks += sum(max(0, stat.count_diff) for stat in after.compare_to(before, "traceback"))
+    tracemalloc.stop()
+    return statistics.mean(peaks), blocks / frames
+
+
+def bench_preprocess(detector, images, args):
+    processor = detector.processor
+    preprocessor = FramePreprocessor(processor.image_processor)
+    frames = [cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR) for image in images]
+    height, width = frames[0].shape[:2]
+    roi = (width // 2 - 192, height // 2 - 192, width // 2 + 192, height // 2 + 192)
+
+    def pil_path(frame):
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return processor(images=image, return_tensors="pt")["pixel_values"]
+
+    def numpy_path(frame):
+        return preprocessor.preprocess(frame)[0]
+
+    def numpy_roi_path(frame):
+        return preprocessor.preprocess(frame, roi)[0]
+
+    paths = [("cvtColor + PIL + processor", pil_path), ("numpy preallocated", numpy_path),
+             ("numpy preallocated, ROI", numpy_roi_path)]
+    medians = {}
+    for name, fn in paths:
+        samples = time_per_frame(fn, frames, args.frames)
+        medians[name] = statistics.median(samples)
+        peak, blocks = allocations_per_frame(fn, frames[0], min(args.frames, 10))
+        report(name, samples)
+        print(f"{'':>24}  peak alloc={peak / 1e6:7.2f} MB/frame  retained blocks={blocks:6.1f}/frame")
+    saved = medians[paths[0][0]] - medians[paths[1][0]]
+    print(f"{'saved per frame':>24}: {saved:.1f} ms (full frame)")
+    diff = (pil_path(frames[0]) - numpy_path(frames[0])).abs()
+    print(f"{'pixel difference':>24}: mean={diff.mean().item():.4f}  max={diff.max().item():.4f}"
+          "  (cv2 vs PIL bicubic resize)")
+
+
+COMMANDS = {
+    'text-cache': bench_text_cache,
+    'batch': bench_batch,
+    'backends': bench_backends,
+    'preprocess': bench_preprocess,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=sorted(COMMANDS))
+    parser.add_argument('--images', nargs='*', help='image files to run on')
+    parser.add_argument('--frames', type=int, default=20, help='timed frames per configuration')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--batches', type=int, default=5, help='timed batches per batch size')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--threads', type=int, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    detector = OwlViTDetector()
+    COMMANDS[args.command](detector, load_images(args.images), args)
+
+
+if __name__ == '__main__':
+    main()
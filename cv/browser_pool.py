@@ -0,0 +1,158 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import List
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+GECKODRIVER_PATH = '/usr/local/bin/geckodriver'
+
+# Identifies what the page's images currently show; changes when an output
+# image is replaced, and ends in ":0" while any of them is still loading
+IMAGE_SIGNATURE_JS = """
+return Array.from(document.images)
+    .map(img => img.currentSrc + ':' + (img.complete && img.naturalWidth > 0 ? 1 : 0))
+    .join('|');
+"""
+
+
+class BrowserSession:
+    """
+    A headless Firefox that stays on the grounding page between calls.
+
+    capture() replaces the textarea contents and waits until the page's
+    images change and finish loading, instead of sleeping a fixed time.
+    """
+
+    def __init__(self, url: str, geckodriver_path: str = GECKODRIVER_PATH,
+                 width: int = 1920, height: int = 1080, load_timeout: float = 30.0):
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument(f'--width={width}')
+        options.add_argument(f'--height={height}')
+        service = Service(executable_path=geckodriver_path)
+        self.driver = webdriver.Firefox(service=service, options=options)
+        self.uses = 0
+        self.last_text = None
+        try:
+            self.driver.get(url)
+            self.text_input = WebDriverWait(self.driver, load_timeout).until(
+                EC.element_to_be_clickable((By.TAG_NAME, 'textarea'))
+            )
+        except Exception:
+            self.quit()
+            raise
+
+    def _image_signature(self) -> str:
+        return self.driver.execute_script(IMAGE_SIGNATURE_JS)
+
+    def _images_updated(self, before: str):
+        def condition(driver):
+            signature = self._image_signature()
+            return signature != before and ':0' not in signature
+        return condition
+
+    def capture(self, objects_list: List[str], timeout: float = 10.0) -> bytes:
+        """Sends the objects to the page and returns a PNG screenshot of the result."""
+        self.uses += 1
+        formatted_text = "\n".join(objects_list)
+        if formatted_text != self.last_text:
+            before = self._image_signature()
+            self.text_input.clear()
+            self.text_input.send_keys(formatted_text)
+            self.last_text = formatted_text
+            try:
+                WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(self._images_updated(before))
+            except TimeoutException:
+                print(f"Page image did not change within {timeout}s, capturing anyway")
+        return self.driver.get_screenshot_as_png()
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
+
+
+class BrowserPool:
+    """
+    Reuses long-lived BrowserSessions across calls.
+
+    session() hands out an idle session, opening a new one if all are busy
+    and fewer than size exist (otherwise it waits for one). A session is
+    quit and replaced after max_uses captures, or as soon as a call using
+    it raises.
+    """
+
+    def __init__(self, url: str, size: int = 1, max_uses: int = 50, **session_options):
+        self.url = url
+        self.size = size
+        self.max_uses = max_uses
+        self.session_options = session_options
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self.created = 0
+        self.recycled = 0
+
+    def _acquire(self) -> BrowserSession:
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_open = self._open < self.size
+                if can_open:
+                    self._open += 1
+            if can_open:
+                break
+            # All sessions busy; one may come back, or be discarded and free a slot
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        try:
+            session = BrowserSession(self.url, **self.session_options)
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+        self.created += 1
+        return session
+
+    def _discard(self, session: BrowserSession):
+        session.quit()
+        with self._lock:
+            self._open -= 1
+        self.recycled += 1
+
+    @contextmanager
+    def session(self):
+        browser = self._acquire()
+        try:
+            yield browser
+        except Exception:
+            self._discard(browser)
+            raise
+        if self._closed or browser.uses >= self.max_uses:
+            self._discard(browser)
+        else:
+            self._idle.put(browser)
+
+    def close(self):
+        """Quits every idle session; sessions in use are quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(browser)
@@ -1,20 +1,19 @@
 import os
-from pathlib import Path
 from dotenv import load_dotenv
 import google.generativeai as genai
-from PIL import Image
 import cv2
 import numpy as np
 from typing import List
-import io
 import warnings
 import logging
-from selenium import webdriver
-from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
 import time
 
+# Run from the repo root with `python -m cv.cv` so `import cv2` picks up
+# OpenCV and the cv package resolves.
+from cv.analysis import AnalysisScheduler, FakeVisionClient, GeminiVisionClient
+from cv.browser_pool import BrowserPool
+from cv.grounding_client import GroundingClient
+
 # Suppress warnings and configure logging
 warnings.filterwarnings('ignore')
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -24,79 +23,107 @@ logging.getLogger('absl').setLevel(logging.ERROR)
 load_dotenv()
 
 class GeminiVisionAnalyzer:
-    def __init__(self, api_key: str):
-        """Initialize the Gemini Vision Analyzer with your API key."""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.webpage_url = "http://localhost:7860"
+    def __init__(self, api_key: str, vision_client=None):
+        """
+        Initialize the Gemini Vision Analyzer with your API key. Any object
+        with list_objects(frame) can stand in for Gemini as vision_client.
+        """
+        if vision_client is None:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            vision_client = GeminiVisionClient(self.model)
+        self.vision = vision_client
+        self.webpage_url = os.getenv("GROUNDING_URL", "http://localhost:7860")
+        # "api" calls the grounding service's HTTP API directly; "browser"
+        # drives its page in a pooled headless Firefox for services without one
+        self.grounding_mode = os.getenv("GROUNDING_MODE", "api")
+        self.grounding = GroundingClient(self.webpage_url)
+        self.browser_pool = BrowserPool(self.webpage_url, size=1, max_uses=50)
+        self.last_boxes = None
 
-    def send_objects_and_capture(self, objects_list: List[str]) -> np.ndarray:
+    def ground_objects(self, objects_list: List[str]):
         """
-        Sends a list of objects to the webpage and captures the resulting image.
-        
-        Args:
-            objects_list (List[str]): List of detected objects
+        Sends a list of objects to the grounding service.
         
         Returns:
-            np.ndarray: Screenshot as an OpenCV image, or None if failed
+            (image, boxes): the annotated image or screenshot as an OpenCV
+            image and, in "api" mode, the structured boxes if the service
+            returned any. Both are None on failure.
         """
-        driver = None
         try:
-            # Configure Firefox options
-            firefox_options = Options()
-            firefox_options.add_argument('--headless')
-            firefox_options.add_argument('--width=1920')
-            firefox_options.add_argument('--height=1080')
-            
-            # Initialize Firefox driver with explicit geckodriver path
-            service = Service(executable_path='/usr/local/bin/geckodriver')
-            driver = webdriver.Firefox(service=service, options=firefox_options)
-            
-            # Navigate to the page
-            print("Accessing webpage...")
-            driver.get(self.webpage_url)
-            
-            # Wait for the page to load
-            time.sleep(2)
-            
-            # Find the text input field and send the objects list
-            text_input = driver.find_element(By.TAG_NAME, "textarea")
-            formatted_text = "\n".join(objects_list)
-            text_input.clear()
-            text_input.send_keys(formatted_text)
-            
-            # Wait for the image to update
-            time.sleep(2)
-            
-            # Take a screenshot
-            print("Capturing screenshot...")
-            screenshot = driver.get_screenshot_as_png()
+            if self.grounding_mode == "api":
+                result = self.grounding.ground(objects_list)
+                return result.image, result.boxes
+
+            print("Sending objects to webpage and capturing screenshot...")
+            with self.browser_pool.session() as browser:
+                screenshot = browser.capture(objects_list)
             
             # Convert screenshot to OpenCV format
             nparr = np.frombuffer(screenshot, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
             
-            return img
+            return img, None
             
         except Exception as e:
-            print(f"Error in send_objects_and_capture: {str(e)}")
+            print(f"Error in ground_objects: {str(e)}")
+            return None, None
+
+    def send_objects_and_capture(self, objects_list: List[str]) -> np.ndarray:
+        """
+        Sends a list of objects to the grounding service and returns the resulting image.
+        The structured boxes, if any, are kept in self.last_boxes.
+        
+        Args:
+            objects_list (List[str]): List of detected objects
+        
+        Returns:
+            np.ndarray: Annotated image or screenshot as an OpenCV image, or None if failed
+        """
+        image, self.last_boxes = self.ground_objects(objects_list)
+        return image
+
+    def analyze_frame(self, frame: np.ndarray) -> dict:
+        """Lists the objects in one frame and grounds them. Runs on an analysis worker thread."""
+        objects = self.vision.list_objects(frame)
+        image, boxes = self.ground_objects(objects) if objects else (None, None)
+        return {'objects': objects, 'image': image, 'boxes': boxes}
+
+    def handle_result(self, result) -> List[str]:
+        """Reports one finished analysis on the capture thread. Returns its objects."""
+        if result.error is not None:
+            print(f"Error analyzing image: {str(result.error)}")
             return None
-            
-        finally:
-            if driver:
-                driver.quit()
+        objects = result.value['objects']
+        if result.value['image'] is not None:
+            # Save or display the screenshot as needed
+            cv2.imwrite("output.png", result.value['image'])
+        if result.value['boxes']:
+            self.last_boxes = result.value['boxes']
+            print(f"Grounded boxes: {self.last_boxes}")
+        print(f"Detected objects: {objects} (frame {result.seq}, {result.age:.2f}s old)")
+        return objects
 
-    def capture_and_analyze(self, interval: float = 5.0) -> List[str]:
+    def capture_and_analyze(self, interval: float = 5.0, max_in_flight: int = 1,
+                            duration: float = None) -> List[str]:
         """
         Capture images from webcam at regular intervals and analyze them for objects.
         
+        The webcam is read continuously. Analyses run on worker threads, at
+        most max_in_flight at a time, each on the newest frame once a slot
+        is free and interval has passed since the previous submission.
+        
         Args:
-            interval (float): Time between captures in seconds (default: 5.0)
+            interval (float): Time between analysis submissions in seconds (default: 5.0)
+            max_in_flight (int): Concurrent analyses (default: 1)
+            duration (float): Seconds to run, or None to run until Ctrl+C
         
         Returns:
-            List of detected objects in the image
+            List of objects detected in the most recent analysis
         """
         cap = None
+        scheduler = AnalysisScheduler(self.analyze_frame, max_in_flight=max_in_flight, interval=interval)
+        latest_objects = []
         try:
             # Initialize webcam with specific properties for Mac
             cap = cv2.VideoCapture(0)
@@ -110,68 +137,56 @@ class GeminiVisionAnalyzer:
 
             print(f"Capturing images every {interval} seconds. Press Ctrl+C to stop...")
             
-            last_capture_time = 0
-            while True:
-                # Read frame from webcam
+            deadline = time.monotonic() + duration if duration else None
+            while deadline is None or time.monotonic() < deadline:
+                # Read frame from webcam; keeps the camera buffer drained while analyses run
                 ret, frame = cap.read()
                 if not ret:
                     raise Exception("Could not read frame")
 
-                current_time = time.time()
-                if current_time - last_capture_time >= interval:
+                if scheduler.offer(frame):
                     print("Capturing and analyzing image...")
-                    # Convert frame to PIL Image
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_image = Image.fromarray(frame_rgb)
-                    
-                    # Create the prompt for object detection
-                    prompt = """Please analyze this image and provide a list of all visible objects.
-                               Return only the objects, one per line, without any additional text or numbers.
-                               Be specific but concise."""
-                    
-                    # Generate response from Gemini
-                    response = self.model.generate_content([prompt, pil_image])
-                    
-                    # Process the response into a list and remove duplicates while preserving order
-                    seen = set()
-                    objects = []
-                    for obj in response.text.split('\n'):
-                        obj = obj.strip()
-                        if obj and obj not in seen:
-                            seen.add(obj)
-                            objects.append(obj)
-                    
-                    # After getting the objects list, send to webpage and capture
-                    if objects:  # Only if objects were detected
-                        screenshot = self.send_objects_and_capture(objects) # use the web tool to get bounding boxes
-        
-                        if screenshot is not None:
-                            # Save or display the screenshot as needed
-                            cv2.imwrite("output.png", screenshot)
-                    
-                    print(f"Detected objects: {objects}")
-                    last_capture_time = current_time
+
+                while not scheduler.results.empty():
+                    objects = self.handle_result(scheduler.results.get_nowait())
+                    if objects is not None:
+                        latest_objects = objects
+            return latest_objects
             
         except KeyboardInterrupt:
             print("\nStopping capture...")
-            return []
+            return latest_objects
         except Exception as e:
             print(f"Error capturing/analyzing image: {str(e)}")
-            return []
+            return latest_objects
         finally:
             # Ensure webcam is released
             if cap is not None:
                 cap.release()
             cv2.destroyAllWindows()
+            # Let in-flight analyses finish before the clients they use are closed
+            scheduler.close(wait=True)
+            print(f"Analysis stats: {scheduler.stats()}")
+            self.browser_pool.close()
+            self.grounding.close()
 
 def main():
+    # VISION_CLIENT=fake replaces Gemini with a local stand-in that takes
+    # FAKE_VISION_LATENCY seconds per call
+    vision_client = None
+    if os.getenv("VISION_CLIENT") == "fake":
+        vision_client = FakeVisionClient(latency=float(os.getenv("FAKE_VISION_LATENCY", "1.0")))
+
     # Get API key from environment
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    if not api_key and vision_client is None:
         raise ValueError("Please set the GEMINI_API_KEY environment variable")
     
-    analyzer = GeminiVisionAnalyzer(api_key)
-    important_objects = analyzer.capture_and_analyze()
+    analyzer = GeminiVisionAnalyzer(api_key, vision_client)
+    important_objects = analyzer.capture_and_analyze(
+        interval=float(os.getenv("ANALYSIS_INTERVAL", "5.0")),
+        max_in_flight=int(os.getenv("ANALYSIS_IN_FLIGHT", "1")),
+    )
     print(important_objects)
     return important_objects
 
@@ -1,112 +1,154 @@
-import requests
-from PIL import Image
-import torch
+import argparse
+import logging
+import os
 import cv2
-import numpy as np
 import time
 
+# Run from the repo root with `python -m cv.cv2` so `import cv2` picks up
+# OpenCV rather than this file.
+from cv.detector import OwlViTDetector
+from cv.pipeline import Pipeline
+from cv.preprocess import FramePreprocessor, roi_around
+from cv.robot_client import ROBOT_URL, RobotClient
+from cv.steering import Steering
+from cv.tracking import ObjectTracker
+from rasp.drive_channel import DEFAULT_PORT as DRIVE_CHANNEL_PORT
 
-from transformers import OwlViTProcessor, OwlViTForObjectDetection
+logger = logging.getLogger(__name__)
 
-processor = OwlViTProcessor.from_pretrained("google/owlvit-base-patch32")
-model = OwlViTForObjectDetection.from_pretrained("google/owlvit-base-patch32")
+texts = [["a bottle", "a notebook"]]
 
-# Initialize webcam
-cap = cv2.VideoCapture(0)
-ret, frame = cap.read()
-if not ret:
-    raise RuntimeError("Could not read from webcam")
+# Text queries are encoded once here; each frame only runs the image side.
+# OWLVIT_BACKEND picks the inference backend: eager (default), int8 or onnx.
+detector = OwlViTDetector(threshold=0.1, backend=os.getenv('OWLVIT_BACKEND', 'eager'))
+detector.set_queries(texts[0])
+preprocessor = FramePreprocessor(detector.processor.image_processor)
 
-# Convert BGR to RGB and then to PIL Image
-rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-image = Image.fromarray(rgb_frame)
+# Margin around the last target for region-of-interest detection, in box
+# widths; None runs detection on the whole frame
+roi_margin = None
+last_target = None
 
-texts = [["a bottle", "a notebook"]]
-inputs = processor(text=texts, images=image, return_tensors="pt")
-outputs = model(**inputs)
+def capture_frame(cap):
+    """Capture stage: grabs the newest webcam frame, or None to end the run."""
+    ret, frame = cap.read()
+    if not ret:
+        print("Could not read from webcam")
+        return None
+    return frame
 
-# Get image dimensions
-target_sizes = torch.Tensor([image.size[::-1]])
-width = float(target_sizes[0][1])
-height = float(target_sizes[0][0])
+def detect(frame):
+    """
+    Runs OwlViT on one BGR frame, or only on the region around the last
+    target when roi_margin is set. Falls back to the whole frame once the
+    region comes up empty.
+    """
+    global last_target
+    roi = None
+    if roi_margin is not None and last_target is not None:
+        roi = roi_around(last_target, frame.shape, margin=roi_margin)
+    pixel_values, size = preprocessor.preprocess(frame, roi)
+    result = detector.detect_preprocessed(pixel_values, [size])[0]
+    if roi is not None:
+        # Shift boxes from ROI back to frame coordinates
+        result["boxes"][:, [0, 2]] += roi[0]
+        result["boxes"][:, [1, 3]] += roi[1]
+    if len(result["scores"]):
+        last_target = result["boxes"][result["scores"].argmax()].tolist()
+    else:
+        last_target = None
+    return result
 
-# Send move command to the robot
-def send_move_command(direction, speed):
-    print('sending move command')
-    print(direction, speed)
-    try:
-        response = requests.post(
-            'http://10.19.179.61:5000/move',
-            headers={'Content-Type': 'application/json'},
-            json={'direction': direction, 'speed': speed}
-        )
-        # Check if the request was successful (status code 2xx)
-        response.raise_for_status()
-    except requests.RequestException as error:
-        print('Movement command error:', error)
+def track(tracker, frame):
+    """Inference stage: full detection every few frames, cheap tracking in between."""
+    height, width = frame.shape[:2]
+    return tracker.update(frame), (width, height)
 
-# Process initial detection
-results = processor.post_process_object_detection(outputs=outputs, target_sizes=target_sizes, threshold=0.1)
-boxes, scores, labels = results[0]["boxes"], results[0]["scores"], results[0]["labels"]
+steering = Steering()
+robot = None
 
-# Main detection loop
-for i in range(10):
-    # Get a new frame and process it
-    ret, frame = cap.read()
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    image = Image.fromarray(rgb_frame)
-    
-    # Run detection
-    inputs = processor(text=texts, images=image, return_tensors="pt")
-    outputs = model(**inputs)
-    results = processor.post_process_object_detection(outputs=outputs, target_sizes=target_sizes, threshold=0.1)
-    boxes, scores, labels = results[0]["boxes"], results[0]["scores"], results[0]["labels"]
+def steer(detection):
+    """Control stage: sends one move command for the best target. Returns None if nothing was sent."""
+    result, (width, height) = detection
+    decision = steering.decide(result, width, height)
+    if decision is None:
+        return None
+    command, _ = decision
+    # Let a running maneuver finish unless the decision changed
+    if not steering.should_send(command):
+        return None
+    kind, payload = command
+    # Queued for the sender thread; this stage never waits on the network
+    if kind == 'move':
+        robot.submit_move(*payload)
+    else:
+        robot.submit_sequence(payload)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow a detected object with the robot.")
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds to run')
+    parser.add_argument('--report-every', type=float, default=10.0, help='seconds between timing reports')
+    parser.add_argument('--detect-every', type=int, default=10,
+                        help='frames between full detections; 1 runs OwlViT on every frame')
+    parser.add_argument('--min-score', type=float, default=0.1,
+                        help='re-detect early once the best tracked score decays below this')
+    parser.add_argument('--tracker', choices=['auto', 'kcf', 'csrt', 'mil', 'none'], default='auto',
+                        help='OpenCV tracker between detections; none holds the last boxes')
+    parser.add_argument('--target', choices=['score', 'nearest'], default='score',
+                        help='follow the highest scoring box or the one nearest the last target')
+    parser.add_argument('--robot-url', default=ROBOT_URL, help='motor server base URL')
+    parser.add_argument('--timeout', type=float, default=1.0, help='seconds to wait for the motor server')
+    parser.add_argument('--retries', type=int, default=1, help='retries on connection errors')
+    parser.add_argument('--udp-port', type=int, nargs='?', const=DRIVE_CHANNEL_PORT,
+                        help=f'send moves over the UDP drive channel (default port {DRIVE_CHANNEL_PORT}) instead of HTTP')
+    parser.add_argument('--debug', action='store_true', help='log every detection and command')
+    parser.add_argument('--roi-margin', type=float,
+                        help='detect only around the last target, this many box widths on each side')
+    args = parser.parse_args()
 
-    # Process each detection
-    for box, score, label in zip(boxes, scores, labels):
-        box = [round(i, 2) for i in box.tolist()]
-        
-        # Calculate center x coordinate and object width
-        center_x = (box[2] + box[0]) / 2
-        obj_width = box[2] - box[0]
-        relative_width = obj_width / width  # Calculate relative width
-        
-        print(f"Detected {texts[0][label]} with confidence {round(score.item(), 3)}")
-        print(f"Center X: {center_x:.2f}, Width: {obj_width:.2f}")
-        print(f"Relative width: {relative_width:.2f}")
-        print(f"Image dimensions - Width: {width:.2f}, Height: {height:.2f}")
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    global roi_margin, steering, robot
+    roi_margin = args.roi_margin
+    steering = Steering(select=args.target)
+    robot = RobotClient(args.robot_url, read_timeout=args.timeout, retries=args.retries,
+                        udp_port=args.udp_port).start()
+    tracker = ObjectTracker(detect, detect_every=args.detect_every, min_score=args.min_score, tracker=args.tracker)
 
-        # First handle forward/stop based on object width
-        if relative_width > 0.4:  # Object is too close
-            print('STOP - Object too close')
-            send_move_command("stop", 0)
-        else:
-            # Then handle left/right steering
-            if center_x > 3*width/4:
-                print("LEFT")
-                send_move_command("right", 15)
-                send_move_command("backward", 5)
-            elif center_x < width/4:
-                print('RIGHT')
-                send_move_command("left", 15)
-                send_move_command("backward", 5)
-            elif center_x > width/2 + 0.06*width:
-                print('left')
-                send_move_command("right", 12)
-                send_move_command("backward", 5)
-            elif center_x < width/2 - 0.06*width:
-                print('right')
-                send_move_command("left", 12)
-                send_move_command("backward", 5)
-            else:
-                print('forward')
-                send_move_command("backward", 15)  
-            
-            time.sleep(1)
-            send_move_command("stop", 0)
-            # Move fseorward slowly when centered
-    
-    time.sleep(0.1)
+    # Initialize webcam
+    cap = cv2.VideoCapture(0)
+    if not cap.isOpened():
+        raise RuntimeError("Could not open webcam")
+
+    # Capture, inference and control each run in their own thread, joined by
+    # latest-wins queues: the camera buffer is drained continuously and
+    # inference always works on the newest frame.
+    pipeline = (
+        Pipeline()
+        .source('capture', lambda: capture_frame(cap))
+        .stage('inference', lambda frame: track(tracker, frame))
+        .stage('control', steer)
+        .start()
+    )
+    try:
+        deadline = time.time() + args.duration
+        while pipeline.running() and time.time() < deadline:
+            pipeline.wait(min(args.report_every, max(0.0, deadline - time.time())))
+            print(pipeline.report())
+            print(tracker.stats(), robot.stats())
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        pipeline.stop()
+        # Stop the sender first so no queued command lands after the final stop
+        robot.stop()
+        robot.move("stop", 0)
+        robot.close()
+        # Release the webcam
+        cap.release()
+        print(pipeline.report())
+        print(tracker.stats(), robot.stats())
 
-# Release the webcam
-cap.release()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import os
+from collections import OrderedDict
+
+import torch
+from transformers import OwlViTProcessor, OwlViTForObjectDetection
+from transformers.models.owlvit.modeling_owlvit import OwlViTObjectDetectionOutput
+
+MODEL_NAME = "google/owlvit-base-patch32"
+ONNX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "owlvit_image_heads.onnx")
+
+
+def run_image_heads(model, pixel_values, query_embeds, query_mask):
+    """
+    Same computation as OwlViTForObjectDetection.forward, minus the text
+    tower: image encoder plus class and box heads. Returns (logits, pred_boxes).
+    """
+    feature_map, _ = model.image_embedder(pixel_values=pixel_values)
+    batch_size, height, width, hidden_dim = feature_map.shape
+    image_feats = feature_map.reshape(batch_size, height * width, hidden_dim)
+    logits, _ = model.class_predictor(image_feats, query_embeds, query_mask)
+    pred_boxes = model.box_predictor(image_feats, feature_map)
+    return logits, pred_boxes
+
+
+class EagerBackend:
+    """The HF model in fp32 under torch.inference_mode()."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, pixel_values, query_embeds, query_mask):
+        with torch.inference_mode():
+            return run_image_heads(self.model, pixel_values, query_embeds, query_mask)
+
+
+class QuantizedBackend(EagerBackend):
+    """
+    Dynamic int8 quantization of every nn.Linear. Quantizes the model in
+    place, so the text queries are encoded by the quantized text tower too.
+    """
+
+    def __init__(self, model):
+        super().__init__(torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        ))
+
+
+class _ImageHeads(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values, query_embeds, query_mask):
+        return run_image_heads(self.model, pixel_values, query_embeds, query_mask)
+
+
+class OnnxBackend:
+    """
+    The image side exported to ONNX and run with ONNX Runtime on CPU. The
+    graph is exported once to onnx_path and reused on later runs; delete
+    the file after changing model or transformers versions.
+    """
+
+    def __init__(self, model, processor, onnx_path=ONNX_PATH):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime: pip install onnxruntime onnx")
+        if not os.path.exists(onnx_path):
+            self._export(model, processor, onnx_path)
+        self.session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def _export(model, processor, onnx_path):
+        size = processor.image_processor.size
+        height, width = size.get("height", 768), size.get("width", 768)
+        example = (
+            torch.zeros(1, 3, height, width),
+            torch.zeros(1, 2, model.config.projection_dim),
+            torch.ones(1, 2, dtype=torch.bool),
+        )
+        with torch.no_grad():
+            torch.onnx.export(
+                _ImageHeads(model), example, onnx_path,
+                input_names=["pixel_values", "query_embeds", "query_mask"],
+                output_names=["logits", "pred_boxes"],
+                dynamic_axes={
+                    "pixel_values": {0: "batch"},
+                    "query_embeds": {0: "batch", 1: "queries"},
+                    "query_mask": {0: "batch", 1: "queries"},
+                    "logits": {0: "batch", 2: "queries"},
+                    "pred_boxes": {0: "batch"},
+                },
+                opset_version=17,
+            )
+
+    def __call__(self, pixel_values, query_embeds, query_mask):
+        logits, pred_boxes = self.session.run(None, {
+            "pixel_values": pixel_values.numpy(),
+            "query_embeds": query_embeds.numpy(),
+            "query_mask": query_mask.numpy(),
+        })
+        return torch.from_numpy(logits), torch.from_numpy(pred_boxes)
+
+
+BACKENDS = ("eager", "int8", "onnx")
+
+
+class OwlViTDetector:
+    """
+    OwlViT open-vocabulary detector that encodes its text queries once.
+
+    Calling the model with both text and image re-tokenizes the queries and
+    runs them through the text tower on every frame, although they almost
+    never change. Here the query embeddings are computed in set_queries()
+    and reused, so each frame only runs the image encoder and the box and
+    class heads.
+
+    detect_batch() runs several frames, each with its own query list if
+    needed, through one forward pass. Encoded query lists are kept in a
+    small LRU cache.
+
+    backend selects how the image side runs: "eager" (fp32 under
+    inference_mode), "int8" (dynamic quantization) or "onnx" (ONNX Runtime).
+    All three return the same result structure.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, threshold=0.1, processor=None, model=None,
+                 query_cache_size=32, backend="eager", onnx_path=ONNX_PATH):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        self.processor = processor or OwlViTProcessor.from_pretrained(model_name)
+        self.model = model or OwlViTForObjectDetection.from_pretrained(model_name)
+        self.model.eval()
+        self.threshold = threshold
+        self.backend_name = backend
+        if backend == "int8":
+            self.backend = QuantizedBackend(self.model)
+        elif backend == "onnx":
+            self.backend = OnnxBackend(self.model, self.processor, onnx_path)
+        else:
+            self.backend = EagerBackend(self.model)
+        self.queries = None
+        self._query_cache = OrderedDict()
+        self._query_cache_size = query_cache_size
+
+    def _encode_queries(self, queries):
+        """Returns the (num_queries, dim) embeddings for a query tuple, cached."""
+        embeds = self._query_cache.get(queries)
+        if embeds is not None:
+            self._query_cache.move_to_end(queries)
+            return embeds
+        text_inputs = self.processor(text=[list(queries)], return_tensors="pt")
+        with torch.inference_mode():
+            embeds = self.model.owlvit.get_text_features(
+                input_ids=text_inputs["input_ids"],
+                attention_mask=text_inputs["attention_mask"],
+            )
+        # Newer transformers return a model output with the projection as pooler_output
+        if not torch.is_tensor(embeds):
+            embeds = embeds.pooler_output
+        self._query_cache[queries] = embeds
+        if len(self._query_cache) > self._query_cache_size:
+            self._query_cache.popitem(last=False)
+        return embeds
+
+    def set_queries(self, queries):
+        """Sets the default query list and encodes it if it's new."""
+        self.queries = tuple(queries)
+        self._encode_queries(self.queries)
+
+    def _stack_queries(self, query_lists):
+        """Pads per-image query embeddings to one (batch, max_queries, dim) tensor plus mask."""
+        encoded = [self._encode_queries(queries) for queries in query_lists]
+        max_queries = max(embeds.shape[0] for embeds in encoded)
+        query_embeds = encoded[0].new_zeros(len(encoded), max_queries, encoded[0].shape[-1])
+        query_mask = torch.zeros(len(encoded), max_queries, dtype=torch.bool)
+        for i, embeds in enumerate(encoded):
+            query_embeds[i, :embeds.shape[0]] = embeds
+            query_mask[i, :embeds.shape[0]] = True
+        return query_embeds, query_mask
+
+    def detect(self, image, queries=None):
+        """
+        Detects the current queries in a PIL image. Returns the same dict
+        as post_process_object_detection: boxes (xmin, ymin, xmax, ymax in
+        pixels), scores and labels (indices into the query list).
+        """
+        if queries is not None:
+            self.set_queries(queries)
+        return self.detect_batch([image])[0]
+
+    def _query_lists(self, queries, count):
+        if queries is None:
+            if self.queries is None:
+                raise ValueError("Call set_queries() or pass queries")
+            return [self.queries] * count
+        if queries and isinstance(queries[0], str):
+            return [tuple(queries)] * count
+        if len(queries) != count:
+            raise ValueError("Need one query list per image")
+        return [tuple(q) for q in queries]
+
+    def detect_batch(self, images, queries=None):
+        """
+        Detects objects in several PIL images with one forward pass.
+
+        queries may be None (use the default set by set_queries()), one
+        query list shared by every image, or one query list per image.
+        Returns one post_process_object_detection dict per image; labels
+        index into that image's own query list.
+        """
+        pixel_values = self.processor(images=list(images), return_tensors="pt")["pixel_values"]
+        return self.detect_preprocessed(pixel_values, [image.size for image in images], queries)
+
+    def detect_preprocessed(self, pixel_values, image_sizes, queries=None):
+        """
+        Same as detect_batch() for already preprocessed (batch, 3, H, W)
+        pixel_values, e.g. from FramePreprocessor. image_sizes holds the
+        (width, height) to rescale each image's boxes to.
+        """
+        query_lists = self._query_lists(queries, len(image_sizes))
+        with torch.inference_mode():
+            query_embeds, query_mask = self._stack_queries(query_lists)
+        logits, pred_boxes = self.backend(pixel_values, query_embeds, query_mask)
+        outputs = OwlViTObjectDetectionOutput(logits=logits, pred_boxes=pred_boxes)
+        # Target image sizes (height, width) to rescale box predictions
+        target_sizes = torch.tensor([(height, width) for width, height in image_sizes])
+        return self.processor.image_processor.post_process_object_detection(
+            outputs=outputs, target_sizes=target_sizes, threshold=self.threshold
+        )
@@ -0,0 +1,120 @@
+import base64
+import json
+import os
+from typing import List, Optional
+
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+GROUNDING_URL = os.getenv('GROUNDING_URL', 'http://localhost:7860')
+GROUNDING_API_NAME = os.getenv('GROUNDING_API_NAME', 'predict')
+
+
+class GroundingError(Exception):
+    pass
+
+
+class GroundingResult:
+    """
+    What the grounding service returned for one call. image is the
+    annotated image as a BGR array if the service returned one, boxes the
+    structured detections ([{'label', 'score', 'box': [x0, y0, x1, y1]}])
+    if it returned any, and data the raw output list.
+    """
+
+    def __init__(self, image: Optional[np.ndarray], boxes: Optional[List[dict]], data: list):
+        self.image = image
+        self.boxes = boxes
+        self.data = data
+
+
+class GroundingClient:
+    """
+    Calls the Gradio-style grounding service on port 7860 over its HTTP API
+    instead of typing into the page and screenshotting it.
+
+    protocol='call' uses the Gradio 4+ queue API: POST
+    /gradio_api/call/<api_name> returns an event id, and GET on
+    /gradio_api/call/<api_name>/<event_id> streams the result as SSE.
+    protocol='run' uses the older single-request POST /run/<api_name>.
+
+    Outputs are decoded generically: a file reference ({'url': ...}) or a
+    data: URL becomes the image; a list of dicts with a 'box', or a dict
+    with a 'boxes' list, becomes the structured boxes.
+    """
+
+    def __init__(self, base_url: str = GROUNDING_URL, api_name: str = GROUNDING_API_NAME,
+                 protocol: str = 'call', timeout: float = 30.0):
+        if protocol not in ('call', 'run'):
+            raise ValueError(f"Unknown protocol {protocol!r}")
+        self.base_url = base_url.rstrip('/')
+        self.api_name = api_name.strip('/')
+        self.protocol = protocol
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=4))
+
+    def _call(self, data: list) -> list:
+        if self.protocol == 'run':
+            response = self.session.post(f"{self.base_url}/run/{self.api_name}", json={'data': data},
+                                         timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()['data']
+
+        endpoint = f"{self.base_url}/gradio_api/call/{self.api_name}"
+        response = self.session.post(endpoint, json={'data': data}, timeout=self.timeout)
+        response.raise_for_status()
+        event_id = response.json()['event_id']
+        event = None
+        with self.session.get(f"{endpoint}/{event_id}", stream=True, timeout=self.timeout) as stream:
+            stream.raise_for_status()
+            for line in stream.iter_lines(decode_unicode=True):
+                if line.startswith('event:'):
+                    event = line[len('event:'):].strip()
+                elif line.startswith('data:') and event in ('complete', 'error'):
+                    payload = line[len('data:'):].strip()
+                    if event == 'error':
+                        raise GroundingError(f"Grounding service error: {payload}")
+                    return json.loads(payload)
+        raise GroundingError("Grounding service closed the stream without a result")
+
+    def _fetch_image(self, value) -> Optional[np.ndarray]:
+        if isinstance(value, dict) and (value.get('url') or value.get('path')):
+            url = value.get('url') or f"{self.base_url}/gradio_api/file={value['path']}"
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            encoded = response.content
+        elif isinstance(value, str) and value.startswith('data:image'):
+            encoded = base64.b64decode(value.split(',', 1)[1])
+        else:
+            return None
+        return cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_COLOR)
+
+    @staticmethod
+    def _parse_boxes(value) -> Optional[List[dict]]:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return None
+        if isinstance(value, dict) and isinstance(value.get('boxes'), list):
+            value = value['boxes']
+        if isinstance(value, list) and value and all(isinstance(item, dict) and 'box' in item for item in value):
+            return value
+        return None
+
+    def ground(self, objects_list: List[str]) -> GroundingResult:
+        """Sends the objects to the service and returns what it found."""
+        data = self._call(["\n".join(objects_list)])
+        image = boxes = None
+        for value in data:
+            if image is None:
+                image = self._fetch_image(value)
+            if boxes is None:
+                boxes = self._parse_boxes(value)
+        return GroundingResult(image, boxes, data)
+
+    def close(self):
+        self.session.close()
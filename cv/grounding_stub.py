@@ -0,0 +1,105 @@
+"""
+Offline stand-in for the grounding service on port 7860.
+
+    python -m cv.grounding_stub --port 7860
+
+Speaks the same Gradio-style HTTP API as GroundingClient expects (both the
+/gradio_api/call queue API and the older /run API). For each call it
+draws one box per requested object on a blank frame and returns the image
+as a file reference plus the boxes as JSON.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+from flask import Flask, Response, jsonify, request
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def fake_boxes(objects):
+    """One deterministic, non-overlapping box per object, laid out in a grid."""
+    boxes = []
+    for i, label in enumerate(objects):
+        col, row = i % 4, i // 4
+        x0, y0 = 40 + col * 300, 40 + row * 220
+        boxes.append({'label': label, 'score': round(0.9 - 0.05 * i, 2), 'box': [x0, y0, x0 + 240, y0 + 180]})
+    return boxes
+
+
+def render(boxes):
+    image = np.full((HEIGHT, WIDTH, 3), 64, dtype=np.uint8)
+    for detection in boxes:
+        x0, y0, x1, y1 = detection['box']
+        cv2.rectangle(image, (x0, y0), (x1, y1), (0, 255, 0), 2)
+        cv2.putText(image, detection['label'], (x0 + 4, y0 + 24), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+def create_app(delay=0.0):
+    app = Flask(__name__)
+    files = {}
+    events = {}
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def predict(data):
+        if delay:
+            time.sleep(delay)
+        objects = [line.strip() for line in str(data[0] if data else '').splitlines() if line.strip()]
+        boxes = fake_boxes(objects)
+        name = f"grounding-{next(counter)}.png"
+        with lock:
+            files[name] = render(boxes)
+        return [
+            {'path': name, 'url': f"{request.host_url}gradio_api/file={name}"},
+            {'boxes': boxes},
+        ]
+
+    @app.route('/run/<api_name>', methods=['POST'])
+    def run(api_name):
+        return jsonify({'data': predict(request.get_json()['data'])})
+
+    @app.route('/gradio_api/call/<api_name>', methods=['POST'])
+    def call(api_name):
+        event_id = uuid.uuid4().hex
+        result = predict(request.get_json()['data'])
+        with lock:
+            events[event_id] = result
+        return jsonify({'event_id': event_id})
+
+    @app.route('/gradio_api/call/<api_name>/<event_id>')
+    def result(api_name, event_id):
+        with lock:
+            data = events.pop(event_id, None)
+        if data is None:
+            return Response("event: error\ndata: null\n\n", mimetype='text/event-stream')
+        return Response(f"event: complete\ndata: {json.dumps(data)}\n\n", mimetype='text/event-stream')
+
+    @app.route('/gradio_api/file=<name>')
+    def file(name):
+        with lock:
+            content = files.pop(name, None)
+        if content is None:
+            return jsonify({'error': 'Unknown file'}), 404
+        return Response(content, mimetype='image/png')
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7860)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds each prediction takes')
+    args = parser.parse_args()
+    create_app(args.delay).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
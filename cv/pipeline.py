@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """
+    Single-slot hand-off between pipeline stages. put() never blocks: it
+    replaces any item the consumer hasn't taken yet, so a slow stage always
+    works on the newest data instead of a growing backlog.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._has_item = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._has_item:
+                self.dropped += 1
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Returns the latest item, or None on timeout or once closed."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_item or self._closed, timeout)
+            if not self._has_item:
+                return None
+            item, self._item, self._has_item = self._item, None, False
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageStats:
+    """Rolling window of per-item durations for one stage, in milliseconds."""
+
+    def __init__(self, name, window=500):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count}
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': sum(ordered) / len(ordered),
+            'p50_ms': ordered[len(ordered) // 2],
+            'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        }
+
+
+class Packet:
+    __slots__ = ('seq', 'captured_at', 'value')
+
+    def __init__(self, seq, captured_at, value):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.value = value
+
+
+class Pipeline:
+    """
+    Source thread plus a chain of worker stages joined by LatestQueues.
+
+    The source function is polled continuously (e.g. cap.read()) and returns
+    the next item, or None to end the pipeline. Each stage function takes
+    the previous stage's output and returns its own; returning None drops
+    the item. Every stage runs in its own thread, so capture keeps draining
+    the camera while inference and control are busy.
+
+    The capture timestamp travels with each item, and the last stage records
+    end-to-end (capture to output) latency.
+    """
+
+    def __init__(self):
+        self._source = None
+        self._stages = []
+        self._threads = []
+        self._running = threading.Event()
+        self.stats = {}
+        self.end_to_end = StageStats('end_to_end')
+
+    def source(self, name, fn):
+        self._source = (name, fn)
+        self.stats[name] = StageStats(name)
+        return self
+
+    def stage(self, name, fn):
+        self._stages.append((name, fn, LatestQueue()))
+        self.stats[name] = StageStats(name)
+        return self
+
+    def start(self):
+        if self._source is None or not self._stages:
+            raise ValueError("Pipeline needs a source and at least one stage")
+        self._running.set()
+        self._threads = [threading.Thread(target=self._run_source, name=self._source[0], daemon=True)]
+        for i, (name, fn, inbox) in enumerate(self._stages):
+            outbox = self._stages[i + 1][2] if i + 1 < len(self._stages) else None
+            self._threads.append(
+                threading.Thread(target=self._run_stage, args=(name, fn, inbox, outbox), name=name, daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        for _, _, inbox in self._stages:
+            inbox.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=5.0)
+
+    def running(self):
+        return self._running.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the source ends or timeout elapses."""
+        self._threads[0].join(timeout)
+
+    def _run_source(self):
+        name, fn = self._source
+        stats = self.stats[name]
+        first_inbox = self._stages[0][2]
+        seq = 0
+        while self._running.is_set():
+            start = time.perf_counter()
+            value = fn()
+            if value is None:
+                break
+            stats.record((time.perf_counter() - start) * 1000)
+            first_inbox.put(Packet(seq, start, value))
+            seq += 1
+        self._running.clear()
+        for _, _, inbox in self._stages:
+            inbox.close()
+
+    def _run_stage(self, name, fn, inbox, outbox):
+        stats = self.stats[name]
+        while self._running.is_set():
+            packet = inbox.get(timeout=0.5)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            try:
+                value = fn(packet.value)
+            except Exception as e:
+                print(f"Error in {name} stage: {str(e)}")
+                continue
+            done = time.perf_counter()
+            stats.record((done - start) * 1000)
+            if value is None:
+                continue
+            if outbox is None:
+                self.end_to_end.record((done - packet.captured_at) * 1000)
+            else:
+                outbox.put(Packet(packet.seq, packet.captured_at, value))
+
+    def report(self):
+        """Per-stage timings, dropped-item counts and end-to-end latency."""
+        lines = []
+        for name, stats in self.stats.items():
+            lines.append(_format_stats(name, stats.summary()))
+        for name, _, inbox in self._stages:
+            lines.append(f"{name:>12}: {inbox.dropped} stale inputs dropped")
+        lines.append(_format_stats('end-to-end', self.end_to_end.summary()))
+        return '\n'.join(lines)
+
+
+def _format_stats(name, summary):
+    if 'mean_ms' not in summary:
+        return f"{name:>12}: n={summary['count']}"
+    return (
+        f"{name:>12}: n={summary['count']:<5} mean={summary['mean_ms']:8.1f} ms  "
+        f"p50={summary['p50_ms']:8.1f} ms  p95={summary['p95_ms']:8.1f} ms"
+    )
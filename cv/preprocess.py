@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import torch
+
+# CLIP normalization used by OwlViT, for when no image processor is given
+CLIP_MEAN = (0.48145466, 0.4578275, 0.40821073)
+CLIP_STD = (0.26862954, 0.26130258, 0.27577711)
+INPUT_SIZE = 768
+
+
+class FramePreprocessor:
+    """
+    Turns BGR webcam frames into OwlViT pixel_values without going through
+    PIL or the HF image processor.
+
+    The resize goes into a preallocated uint8 buffer, and the BGR->RGB swap,
+    rescale and mean/std normalization are fused into one multiply and one
+    subtract per channel written straight into a preallocated float32
+    (1, 3, H, W) buffer. After the first frame no per-frame arrays are
+    allocated.
+
+    The returned tensor shares memory with that buffer, so it is only valid
+    until the next preprocess() call.
+    """
+
+    def __init__(self, image_processor=None, interpolation=cv2.INTER_CUBIC):
+        if image_processor is not None:
+            size = image_processor.size
+            self.height = size.get("height", size.get("shortest_edge", INPUT_SIZE))
+            self.width = size.get("width", size.get("shortest_edge", INPUT_SIZE))
+            mean, std = image_processor.image_mean, image_processor.image_std
+            rescale = image_processor.rescale_factor
+        else:
+            self.height = self.width = INPUT_SIZE
+            mean, std, rescale = CLIP_MEAN, CLIP_STD, 1 / 255
+        self.interpolation = interpolation
+        # (pixel * rescale - mean) / std == pixel * scale - offset
+        self._scale = np.asarray(rescale, dtype=np.float32) / np.asarray(std, dtype=np.float32)
+        self._offset = np.asarray(mean, dtype=np.float32) / np.asarray(std, dtype=np.float32)
+        self._resized = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._pixels = np.empty((1, 3, self.height, self.width), dtype=np.float32)
+        self._tensor = torch.from_numpy(self._pixels)
+
+    def preprocess(self, frame, roi=None):
+        """
+        Returns (pixel_values, (width, height)) for a BGR frame, or for the
+        (x0, y0, x1, y1) region of it if roi is given. The size is the one
+        to rescale boxes to; boxes then need roi's (x0, y0) added back.
+        """
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            frame = frame[y0:y1, x0:x1]
+        height, width = frame.shape[:2]
+        cv2.resize(frame, (self.width, self.height), dst=self._resized, interpolation=self.interpolation)
+        for c in range(3):
+            # Channel c of the RGB output comes from channel 2 - c of BGR
+            out = self._pixels[0, c]
+            np.multiply(self._resized[:, :, 2 - c], self._scale[c], out=out, casting="unsafe")
+            np.subtract(out, self._offset[c], out=out)
+        return self._tensor, (width, height)
+
+
+def roi_around(box, frame_shape, margin=1.0, min_size=256):
+    """
+    Square-ish (x0, y0, x1, y1) region centred on box, margin box-widths
+    wider on each side, at least min_size pixels, clipped to the frame.
+    """
+    frame_height, frame_width = frame_shape[:2]
+    x0, y0, x1, y1 = box
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    half = max((x1 - x0), (y1 - y0)) * (0.5 + margin)
+    half = max(half, min_size / 2)
+    left = int(max(0, cx - half))
+    top = int(max(0, cy - half))
+    right = int(min(frame_width, cx + half))
+    bottom = int(min(frame_height, cy + half))
+    return left, top, right, bottom
@@ -0,0 +1,148 @@
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cv.pipeline import LatestQueue
+from rasp.drive_channel import STATUS_APPLIED, STATUS_STALE, DriveChannelClient
+
+logger = logging.getLogger(__name__)
+
+ROBOT_URL = os.getenv('ROBOT_URL', 'http://10.19.179.61:5000')
+
+
+class RobotClient:
+    """
+    HTTP client for the motor server on the Pi.
+
+    All requests go through one requests.Session with a keep-alive
+    connection pool, so commands after the first skip TCP setup. Failed
+    connections and 502/503/504 answers are retried up to retries times
+    with backoff.
+
+    move() and sequence() block until the Pi answers. submit_move() and
+    submit_sequence() return immediately: a background thread sends them
+    through a latest-wins outbox, so a command the Pi hasn't been sent yet
+    is replaced by a newer one instead of queueing up behind it.
+
+    With udp_port set, moves go over the Pi's UDP drive channel instead of
+    HTTP /move (one datagram and ack each, resent up to retries times when
+    no ack arrives within read_timeout). Sequences always use HTTP.
+    """
+
+    def __init__(self, base_url=ROBOT_URL, connect_timeout=0.5, read_timeout=1.0, retries=1,
+                 backoff=0.05, pool_size=4, udp_port=None):
+        self.base_url = base_url.rstrip('/')
+        self.retries = retries
+        self.channel = None
+        self._channel_lock = threading.Lock()
+        if udp_port is not None:
+            self.channel = DriveChannelClient(urlparse(self.base_url).hostname, udp_port, timeout=read_timeout)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries, connect=retries, read=0, backoff_factor=backoff,
+            status_forcelist=(502, 503, 504), allowed_methods=frozenset(['POST']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._outbox = LatestQueue()
+        self._sender = None
+        self._running = False
+        self.sent = 0
+        self.failed = 0
+
+    def post(self, path, payload):
+        """POSTs payload as JSON to path. Returns True on a 2xx answer."""
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            # Check if the request was successful (status code 2xx)
+            response.raise_for_status()
+            self.sent += 1
+            return True
+        except requests.RequestException as error:
+            self.failed += 1
+            logger.error(f"Robot command {path} error: {error}")
+            return False
+
+    def move(self, direction, speed):
+        logger.debug(f"Sending move command {direction} {speed}")
+        if self.channel is not None:
+            return self._send_datagram(direction, speed)
+        return self.post('/move', {'direction': direction, 'speed': speed})
+
+    def _send_datagram(self, direction, speed):
+        """Sends a move over the UDP channel. Returns True once the Pi acks it."""
+        with self._channel_lock:
+            for _ in range(self.retries + 1):
+                status = self.channel.send(direction, speed)
+                if status is None:
+                    continue
+                # Stale means a newer command of ours already got there
+                if status in (STATUS_APPLIED, STATUS_STALE):
+                    self.sent += 1
+                    return True
+                break
+        self.failed += 1
+        logger.error(f"Robot command {direction} {speed} over UDP got {'no ack' if status is None else f'status {status}'}")
+        return False
+
+    def sequence(self, steps):
+        """
+        Sends a timed multi-step maneuver in one request; the Pi runs it
+        with local timing and stops afterwards. A newer sequence cancels
+        the previous one.
+        """
+        logger.debug(f"Sending sequence {steps}")
+        return self.post('/sequence', {'steps': [
+            {'direction': direction, 'speed': speed, 'duration_ms': duration_ms}
+            for direction, speed, duration_ms in steps
+        ]})
+
+    def start(self):
+        self._running = True
+        self._sender = threading.Thread(target=self._run_sender, name='robot-sender', daemon=True)
+        self._sender.start()
+        return self
+
+    def submit_move(self, direction, speed):
+        self._outbox.put((self.move, (direction, speed)))
+
+    def submit_sequence(self, steps):
+        self._outbox.put((self.sequence, (steps,)))
+
+    def _run_sender(self):
+        while self._running:
+            item = self._outbox.get(timeout=0.5)
+            if item is None:
+                continue
+            send, args = item
+            send(*args)
+
+    def stop(self):
+        """
+        Stops the sender, dropping anything still in the outbox. move() and
+        sequence() keep working until close().
+        """
+        self._running = False
+        self._outbox.close()
+        if self._sender is not None:
+            self._sender.join(timeout=2.0)
+            self._sender = None
+
+    def close(self):
+        """Stops the sender and closes the connection pool (and UDP socket)."""
+        self.stop()
+        self.session.close()
+        if self.channel is not None:
+            self.channel.close()
+
+    def stats(self):
+        return {'sent': self.sent, 'failed': self.failed, 'superseded': self._outbox.dropped,
+                'transport': 'udp' if self.channel is not None else 'http'}
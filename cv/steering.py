@@ -0,0 +1,120 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long each steering maneuver runs before the robot stops (ms)
+TURN_MS = 200
+MANEUVER_MS = 1000
+
+# Relative object width above which the target counts as too close
+TOO_CLOSE = 0.4
+
+STOP = ('move', ('stop', 0))
+
+
+def steering_command(relative_x):
+    """
+    The maneuver for a target centred at relative_x (0 = left edge, 1 =
+    right edge of the frame). The robot's "backward" drives it toward the
+    camera's view.
+    """
+    if relative_x > 3 / 4:
+        return ('sequence', (("right", 15, TURN_MS), ("backward", 5, MANEUVER_MS - TURN_MS)))
+    if relative_x < 1 / 4:
+        return ('sequence', (("left", 15, TURN_MS), ("backward", 5, MANEUVER_MS - TURN_MS)))
+    if relative_x > 0.5 + 0.06:
+        return ('sequence', (("right", 12, TURN_MS), ("backward", 5, MANEUVER_MS - TURN_MS)))
+    if relative_x < 0.5 - 0.06:
+        return ('sequence', (("left", 12, TURN_MS), ("backward", 5, MANEUVER_MS - TURN_MS)))
+    return ('sequence', (("backward", 15, MANEUVER_MS),))
+
+
+def maneuver_ms(command):
+    """How long command keeps the robot busy; STOP counts as one maneuver."""
+    kind, payload = command
+    if kind == 'sequence':
+        return sum(duration_ms for _, _, duration_ms in payload)
+    return MANEUVER_MS
+
+
+def build_steering_table(resolution=100):
+    """steering_command() sampled at the centre of each of resolution bins."""
+    return [steering_command((i + 0.5) / resolution) for i in range(resolution)]
+
+
+class Steering:
+    """
+    Picks one target per frame and maps it to one robot command.
+
+    select='score' follows the highest scoring box; select='nearest'
+    follows the box whose centre is closest to the previous target's and
+    falls back to the highest score when there is no previous target.
+    Target selection is a couple of tensor ops over all boxes, and the
+    command is a lookup into a table precomputed at resolution bins across
+    the frame width.
+
+    decide() runs every frame, but the Pi restarts a maneuver whenever a
+    new /sequence arrives, so should_send() lets a command through only
+    when it differs from the last one sent or that one's maneuver has run
+    its full duration.
+    """
+
+    def __init__(self, select='score', resolution=100, too_close=TOO_CLOSE):
+        if select not in ('score', 'nearest'):
+            raise ValueError(f"Unknown target selection {select!r}")
+        self.select = select
+        self.resolution = resolution
+        self.too_close = too_close
+        self.table = build_steering_table(resolution)
+        self.last_center = None
+        self._last_sent = None
+        self._busy_until = 0.0
+
+    def should_send(self, command, now=None):
+        """True if command should go to the robot now; records it as sent if so."""
+        now = time.monotonic() if now is None else now
+        if command == self._last_sent and now < self._busy_until:
+            return False
+        self._last_sent = command
+        self._busy_until = now + maneuver_ms(command) / 1000
+        return True
+
+    def select_target(self, boxes, scores):
+        """Index of the target box, or None if there are no boxes."""
+        if len(scores) == 0:
+            return None
+        if self.select == 'nearest' and self.last_center is not None:
+            centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+            distances = ((centers - self.last_center) ** 2).sum(dim=1)
+            return int(distances.argmin())
+        return int(scores.argmax())
+
+    def decide(self, result, width, height):
+        """
+        Returns (command, index) for a post_process_object_detection style
+        result, or None if nothing was detected. command is STOP or
+        ('sequence', steps).
+        """
+        boxes, scores = result['boxes'], result['scores']
+        index = self.select_target(boxes, scores)
+        if index is None:
+            self.last_center = None
+            return None
+        box = boxes[index]
+        self.last_center = (box[:2] + box[2:]) / 2
+        relative_x = float(self.last_center[0]) / width
+        relative_width = float(box[2] - box[0]) / width
+        if relative_width > self.too_close:
+            command = STOP
+        else:
+            bin_index = min(self.resolution - 1, max(0, int(relative_x * self.resolution)))
+            command = self.table[bin_index]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Target {index} of {len(scores)}: label {int(result['labels'][index])} "
+                f"score {float(scores[index]):.3f}, center x {relative_x:.2f}, "
+                f"relative width {relative_width:.2f} of {width}x{height} -> {command}"
+            )
+        return command, index
+
@@ -0,0 +1,33 @@
+"""
+Steering.should_send(): a maneuver is only resent when the decision
+changes or the previous one has run its full duration.
+
+    python -m pytest cv/test_steering.py
+"""
+import os
+import sys
+
+# Same as test_tracking: keep cv/ off sys.path so `cv` is the package, not cv.py
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != HERE]
+
+from cv.steering import MANEUVER_MS, STOP, Steering, maneuver_ms, steering_command
+
+FRAME_S = 1 / 30
+
+
+def sent_frames(commands, start=100.0):
+    steering = Steering()
+    return [i for i, command in enumerate(commands) if steering.should_send(command, start + i * FRAME_S)]
+
+
+def test_steady_decision_is_sent_once_per_maneuver():
+    turn = steering_command(0.9)
+    assert maneuver_ms(turn) == MANEUVER_MS
+    # 3 s of frames at 30 fps with the target held off to the right
+    assert sent_frames([turn] * 90) == [0, 30, 60]
+
+
+def test_changed_decision_is_sent_immediately():
+    right, left = steering_command(0.9), steering_command(0.1)
+    assert sent_frames([right, right, left, left, STOP, STOP]) == [0, 2, 4]
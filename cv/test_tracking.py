@@ -0,0 +1,91 @@
+"""
+ObjectTracker scheduling and track bookkeeping, with numpy outputs so
+torch isn't needed.
+
+    python -m pytest cv/test_tracking.py
+"""
+import os
+import sys
+
+# pytest puts this directory on sys.path, where cv2.py (the follow loop)
+# would shadow OpenCV; drop it so cv.tracking gets the real cv2
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != HERE]
+
+import numpy as np
+import pytest
+
+from cv.tracking import ObjectTracker
+
+FRAME = np.zeros((64, 64, 3), dtype=np.uint8)
+
+
+class FakeDetector:
+    """Returns one box per frame, shifted by step pixels each call."""
+
+    def __init__(self, score=0.9, step=0.0):
+        self.score = score
+        self.step = step
+        self.calls = 0
+
+    def __call__(self, frame):
+        offset = self.calls * self.step
+        self.calls += 1
+        return {
+            'boxes': np.array([[10.0 + offset, 10.0, 30.0 + offset, 30.0]]),
+            'scores': np.array([self.score]),
+            'labels': np.array([0]),
+        }
+
+
+def make_tracker(detect, **options):
+    options.setdefault('tracker', 'none')
+    return ObjectTracker(detect, tensor=lambda data, dtype: np.array(data, dtype=dtype), **options)
+
+
+def cadence(tracker, frames=9):
+    return ''.join('D' if tracker.update(FRAME)['detected'] else '.' for _ in range(frames))
+
+
+@pytest.mark.parametrize('detect_every, expected', [
+    (1, 'DDDDDDDDD'),
+    (3, 'D..D..D..'),
+])
+def test_detects_every_n_frames(detect_every, expected):
+    assert cadence(make_tracker(FakeDetector(), detect_every=detect_every)) == expected
+
+
+def test_tracks_between_detections():
+    detector = FakeDetector(step=2.0)
+    tracker = make_tracker(detector, detect_every=4, decay=0.5)
+
+    first = tracker.update(FRAME)
+    held = tracker.update(FRAME)
+    assert detector.calls == 1
+    # Without an OpenCV tracker the box is held, and its score decays
+    np.testing.assert_allclose(held['boxes'], first['boxes'])
+    assert held['scores'][0] == pytest.approx(0.45)
+    assert list(held['track_ids']) == list(first['track_ids'])
+
+    tracker.update(FRAME)
+    tracker.update(FRAME)
+    redetected = tracker.update(FRAME)
+    assert redetected['detected'] and detector.calls == 2
+    # The shifted box still overlaps the track, so it keeps its id
+    assert list(redetected['track_ids']) == list(first['track_ids'])
+    assert tracker.stats()['tracked_frames'] == 3
+
+
+def test_redetects_early_when_confidence_decays():
+    tracker = make_tracker(FakeDetector(score=0.2), detect_every=10, min_score=0.1, decay=0.5)
+    # 0.2 -> 0.1 -> 0.05 over two tracked frames, so the fourth frame re-detects
+    assert cadence(tracker, frames=5) == 'D..D.'
+
+
+def test_empty_detection_outputs_keep_their_shape():
+    tracker = make_tracker(lambda frame: {
+        'boxes': np.zeros((0, 4)), 'scores': np.zeros(0), 'labels': np.zeros(0, dtype=np.int64),
+    })
+    result = tracker.update(FRAME)
+    assert result['boxes'].shape == (0, 4)
+    assert result['detected']
@@ -0,0 +1,179 @@
+import cv2
+
+# OpenCV trackers in order of preference. KCF and CSRT need opencv-contrib
+# (cv2.legacy on newer 4.x builds); MIL ships with plain opencv-python.
+TRACKER_FACTORIES = {
+    'kcf': ('TrackerKCF_create',),
+    'csrt': ('TrackerCSRT_create',),
+    'mil': ('TrackerMIL_create',),
+}
+
+
+def make_tracker_factory(kind='auto'):
+    """
+    Returns a callable that creates an OpenCV tracker, or None if the
+    requested kind isn't available ('none' always returns None).
+    """
+    if kind == 'none':
+        return None
+    kinds = list(TRACKER_FACTORIES) if kind == 'auto' else [kind]
+    for name in kinds:
+        for attr in TRACKER_FACTORIES[name]:
+            for module in (cv2, getattr(cv2, 'legacy', None)):
+                factory = getattr(module, attr, None) if module is not None else None
+                if factory is not None:
+                    return factory
+    return None
+
+
+def torch_tensor(data, dtype):
+    """Default output constructor: a torch tensor of the named dtype."""
+    import torch
+    return torch.tensor(data, dtype=getattr(torch, dtype))
+
+
+def box_iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    __slots__ = ('track_id', 'box', 'score', 'label', 'age', 'tracker')
+
+    def __init__(self, track_id, box, score, label):
+        self.track_id = track_id
+        self.box = box
+        self.score = score
+        self.label = label
+        self.age = 0  # frames since the last full detection confirmed this track
+        self.tracker = None
+
+
+class ObjectTracker:
+    """
+    Runs the full detector only every detect_every frames, or sooner once
+    confidence in the current tracks drops below min_score, and follows the
+    detected boxes with a cheap OpenCV tracker in between.
+
+    detect is a callable taking a BGR frame and returning a
+    post_process_object_detection dict. update() returns a dict of the same
+    shape for every frame, so the control stage can run at camera rate.
+
+    A track's confidence is its last detection score decayed by decay per
+    tracked frame. A track is dropped when its tracker loses it or after
+    max_age frames. When a new detection overlaps an existing track
+    (IoU >= match_iou, same label) it keeps that track's id. Without an
+    OpenCV tracker, boxes are held in place until the next detection.
+
+    tensor(data, dtype_name) builds the output arrays; it defaults to
+    torch_tensor, and anything with the same signature (np.array, say)
+    works too.
+    """
+
+    def __init__(self, detect, detect_every=10, min_score=0.1, decay=0.97, max_age=30,
+                 max_tracks=3, match_iou=0.3, tracker='auto', tensor=torch_tensor):
+        self.detect = detect
+        self.tensor = tensor
+        self.detect_every = detect_every
+        self.min_score = min_score
+        self.decay = decay
+        self.max_age = max_age
+        self.max_tracks = max_tracks
+        self.match_iou = match_iou
+        self.tracker_factory = make_tracker_factory(tracker)
+        self.tracks = []
+        self._next_id = 0
+        self._since_detection = None
+        self.detections = 0
+        self.tracked_frames = 0
+        self.tracks_lost = 0
+
+    def _needs_detection(self):
+        # _since_detection counts the detection frame itself, so detect_every=1 detects every frame
+        if self._since_detection is None or self._since_detection >= self.detect_every:
+            return True
+        return not self.tracks or max(track.score for track in self.tracks) < self.min_score
+
+    def _start_tracker(self, track, frame):
+        if self.tracker_factory is None:
+            return
+        x0, y0, x1, y1 = track.box
+        track.tracker = self.tracker_factory()
+        track.tracker.init(frame, (int(x0), int(y0), max(1, int(x1 - x0)), max(1, int(y1 - y0))))
+
+    def _redetect(self, frame):
+        result = self.detect(frame)
+        self.detections += 1
+        self._since_detection = 1
+        candidates = sorted(
+            zip(result['boxes'].tolist(), result['scores'].tolist(), result['labels'].tolist()),
+            key=lambda detection: detection[1], reverse=True,
+        )[:self.max_tracks]
+        previous = self.tracks
+        self.tracks = []
+        for box, score, label in candidates:
+            match = max(
+                (track for track in previous if track.label == label),
+                key=lambda track: box_iou(track.box, box), default=None,
+            )
+            if match is not None and box_iou(match.box, box) >= self.match_iou:
+                previous.remove(match)
+                track_id = match.track_id
+            else:
+                track_id = self._next_id
+                self._next_id += 1
+            track = Track(track_id, box, score, label)
+            self._start_tracker(track, frame)
+            self.tracks.append(track)
+
+    def _follow(self, frame):
+        self.tracked_frames += 1
+        self._since_detection += 1
+        alive = []
+        for track in self.tracks:
+            track.age += 1
+            track.score *= self.decay
+            if track.tracker is not None:
+                ok, (x, y, w, h) = track.tracker.update(frame)
+                if not ok:
+                    self.tracks_lost += 1
+                    continue
+                track.box = [float(x), float(y), float(x + w), float(y + h)]
+            if track.age > self.max_age:
+                self.tracks_lost += 1
+                continue
+            alive.append(track)
+        self.tracks = alive
+
+    def update(self, frame):
+        """
+        Advances one frame. Returns boxes (xmin, ymin, xmax, ymax), scores,
+        labels and track_ids tensors plus detected=True if the full
+        detector ran on this frame.
+        """
+        detected = self._needs_detection()
+        if detected:
+            self._redetect(frame)
+        else:
+            self._follow(frame)
+        return {
+            'boxes': self.tensor([track.box for track in self.tracks], 'float32').reshape(-1, 4),
+            'scores': self.tensor([track.score for track in self.tracks], 'float32'),
+            'labels': self.tensor([track.label for track in self.tracks], 'int64'),
+            'track_ids': self.tensor([track.track_id for track in self.tracks], 'int64'),
+            'detected': detected,
+        }
+
+    def stats(self):
+        frames = self.detections + self.tracked_frames
+        return {
+            'frames': frames,
+            'detections': self.detections,
+            'tracked_frames': self.tracked_frames,
+            'detection_ratio': self.detections / frames if frames else None,
+            'tracks_lost': self.tracks_lost,
+            'active_tracks': len(self.tracks),
+        }
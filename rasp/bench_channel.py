@@ -0,0 +1,98 @@
+"""
+Compares per-command round-trip latency of the HTTP /move endpoint against
+the UDP drive channel at joystick-like command rates.
+
+Usage:
+    python bench_channel.py --host 10.19.179.61 --rates 20 50 --duration 10
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from drive_channel import DriveChannelClient, DEFAULT_PORT, STATUS_APPLIED
+
+# Alternate between two commands so every tick is a real state change
+COMMANDS = [('forward', 40), ('left', 40)]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_paced(send, rate, duration):
+    """Calls send(direction, speed) at a fixed rate; returns (latencies_ms, failures)."""
+    interval = 1.0 / rate
+    latencies = []
+    failures = 0
+    next_tick = time.perf_counter()
+    end = next_tick + duration
+    i = 0
+    while next_tick < end:
+        direction, speed = COMMANDS[i % len(COMMANDS)]
+        start = time.perf_counter()
+        ok = send(direction, speed)
+        elapsed = (time.perf_counter() - start) * 1000
+        if ok:
+            latencies.append(elapsed)
+        else:
+            failures += 1
+        i += 1
+        next_tick += interval
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    return latencies, failures
+
+
+def report(name, rate, latencies, failures):
+    if not latencies:
+        print(f"{name:>5} @ {rate:>3} Hz: no successful commands ({failures} failed)")
+        return
+    print(
+        f"{name:>5} @ {rate:>3} Hz: n={len(latencies):<5} "
+        f"mean={statistics.mean(latencies):7.2f} ms  "
+        f"p50={percentile(latencies, 50):7.2f} ms  "
+        f"p99={percentile(latencies, 99):7.2f} ms  "
+        f"failed={failures}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--http-port', type=int, default=5000)
+    parser.add_argument('--udp-port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--rates', type=int, nargs='+', default=[20, 50])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per run')
+    args = parser.parse_args()
+
+    move_url = f'http://{args.host}:{args.http_port}/move'
+
+    def send_http(direction, speed):
+        try:
+            # Same call pattern as the existing clients: one POST per tick
+            response = requests.post(move_url, json={'direction': direction, 'speed': speed}, timeout=1.0)
+            return response.ok
+        except requests.RequestException:
+            return False
+
+    udp_client = DriveChannelClient(args.host, args.udp_port, timeout=0.25)
+
+    def send_udp(direction, speed):
+        return udp_client.send(direction, speed) == STATUS_APPLIED
+
+    try:
+        for rate in args.rates:
+            report('http', rate, *run_paced(send_http, rate, args.duration))
+            report('udp', rate, *run_paced(send_udp, rate, args.duration))
+        send_udp('stop', 0)
+    finally:
+        udp_client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the per-command cost of the old drive.py dispatch path (fork+exec
+of a shell script per move) against the in-process CommandDispatcher.
+
+Runs against the simulated GPIO backend, so the numbers isolate dispatch
+overhead from the motors themselves. Run it on the Pi for real figures.
+
+Usage:
+    python bench_dispatch.py --commands 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+os.environ.setdefault('ROBOT_GPIO_BACKEND', 'sim')
+
+import drive
+
+COMMANDS = [('forward', 40), ('left', 40), ('right', 30), ('backward', 50)]
+
+# Stand-in for send_command.sh: the old path paid for the fork+exec and
+# shell startup before doing any work.
+STUB_SCRIPT = '#!/bin/sh\nexit 0\n'
+
+
+def bench_subprocess(n):
+    with tempfile.NamedTemporaryFile('w', suffix='.sh', delete=False) as script:
+        script.write(STUB_SCRIPT)
+    os.chmod(script.name, 0o755)
+    samples = []
+    try:
+        for i in range(n):
+            direction, speed = COMMANDS[i % len(COMMANDS)]
+            start = time.perf_counter()
+            subprocess.run([script.name, direction, str(speed)], capture_output=True, text=True)
+            samples.append((time.perf_counter() - start) * 1e6)
+    finally:
+        os.remove(script.name)
+    return samples
+
+
+def bench_dispatcher(n):
+    """Returns (enqueue cost per call, end-to-end cost per command) in microseconds."""
+    samples = []
+    start_all = time.perf_counter()
+    for i in range(n):
+        direction, speed = COMMANDS[i % len(COMMANDS)]
+        start = time.perf_counter()
+        drive.send_move_command(direction, speed)
+        samples.append((time.perf_counter() - start) * 1e6)
+    drive.dispatcher.wait_idle()
+    total = (time.perf_counter() - start_all) * 1e6 / n
+    return samples, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=500)
+    args = parser.parse_args()
+
+    # The move helpers print on every call; keep that out of the measurement
+    drive.print = lambda *a, **k: None
+
+    old = bench_subprocess(args.commands)
+    new, end_to_end = bench_dispatcher(args.commands)
+    drive.stop_all_motors()
+
+    print(f"subprocess per move : mean={statistics.mean(old):9.1f} us  median={statistics.median(old):9.1f} us")
+    print(f"dispatcher enqueue  : mean={statistics.mean(new):9.1f} us  median={statistics.median(new):9.1f} us")
+    print(f"dispatcher applied  : {end_to_end:9.1f} us per command including GPIO writes")
+    print(f"speedup (median)    : {statistics.median(old) / statistics.median(new):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,10 @@
-import RPi.GPIO as GPIO
-import time
 from flask import Flask, jsonify, request
-import subprocess
-import os
+import queue
+import threading
+from gpio_backend import load_gpio
+
+# RPi.GPIO on the robot, or the in-memory simulator with ROBOT_GPIO_BACKEND=sim
+GPIO = load_gpio()
 
 # Define the Motor class
 class Motor:
@@ -74,27 +76,94 @@ def stop_all_motors():
 # Initialize Flask app
 app = Flask(__name__)
 
-# Get the directory where the script is located
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-COMMAND_SCRIPT = os.path.join(SCRIPT_DIR, 'send_command.sh')
+MOVE_COMMANDS = {
+    'forward': move_forward,
+    'backward': move_backward,
+    'left': turn_left,
+    'right': turn_right,
+}
+
+class CommandDispatcher:
+    """
+    Long-lived worker that applies move commands in-process, replacing the
+    old fork+exec of send_command.sh per request. dispatch() only validates
+    and enqueues, so the request handler returns in microseconds.
+
+    Stops jump the queue: stop() drops every move still waiting and queues
+    the stop in their place, so a move sent before a stop can never run
+    after it. stop(cleanup=True) also releases the GPIO pins and shuts the
+    worker down; later dispatches are rejected.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name='move-dispatcher', daemon=True)
+        self._thread.start()
+
+    def dispatch(self, direction, speed):
+        if direction in ('stop', 'center'):
+            self.stop()
+            return True
+        if direction not in MOVE_COMMANDS:
+            return False
+        with self._lock:
+            if self._closed:
+                return False
+            self._queue.put((direction, speed, None))
+        return True
 
-# Make sure the script is executable
-subprocess.run(['chmod', '+x', COMMAND_SCRIPT])
+    def stop(self, cleanup=False):
+        """
+        Drops pending moves and queues a stop (and GPIO cleanup, if asked).
+        Returns an Event that is set once the motors have been stopped.
+        """
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                # Already cleaned up; the worker is gone and the motors are off
+                done.set()
+                return done
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+                self.dropped += 1
+            self._queue.put(('cleanup' if cleanup else 'stop', 0, done))
+            self._closed = cleanup
+        return done
+
+    def wait_idle(self):
+        """Blocks until every dispatched command has been applied."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            direction, speed, done = self._queue.get()
+            try:
+                if direction in ('stop', 'cleanup'):
+                    stop_all_motors()
+                    if direction == 'cleanup':
+                        GPIO.cleanup()
+                else:
+                    MOVE_COMMANDS[direction](speed)
+            except Exception as e:
+                print(f"Exception applying command: {e}")
+            finally:
+                if done is not None:
+                    done.set()
+                self._queue.task_done()
+            if direction == 'cleanup':
+                return
+
+dispatcher = CommandDispatcher()
 
 def send_move_command(direction, speed):
-    try:
-        result = subprocess.run(
-            [COMMAND_SCRIPT, direction, str(speed)],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            print(f"Error sending command: {result.stderr}")
-            return False
-        return True
-    except Exception as e:
-        print(f"Exception sending command: {e}")
-        return False
+    return dispatcher.dispatch(direction, speed)
 
 @app.route('/move', methods=['POST'])
 def handle_move():
@@ -111,7 +180,7 @@ def handle_move():
 
         success = send_move_command(direction, speed)
         if not success:
-            return jsonify({'error': 'Failed to send movement command'}), 500
+            return jsonify({'error': 'Invalid direction'}), 400
 
         return jsonify({
             'status': 'success',
@@ -124,14 +193,14 @@ def handle_move():
 @app.route('/stop', methods=['POST'])
 def handle_stop():
     try:
-        stop_all_motors()
+        if not dispatcher.stop().wait(timeout=1.0):
+            return jsonify({'error': 'Timed out waiting for the motors to stop'}), 500
         return jsonify({'status': 'success', 'message': 'All motors stopped'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 def cleanup():
-    stop_all_motors()
-    GPIO.cleanup()
+    dispatcher.stop(cleanup=True).wait(timeout=2.0)
 
 if __name__ == "__main__":
     try:
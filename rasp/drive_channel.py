@@ -0,0 +1,166 @@
+import socket
+import struct
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Wire format (network byte order):
+#   command: version (B), seq (I), direction code (c), speed (B)  -> 7 bytes
+#   ack:     version (B), seq (I), status (B)                     -> 6 bytes
+PROTOCOL_VERSION = 1
+COMMAND = struct.Struct('!BIcB')
+ACK = struct.Struct('!BIB')
+
+DEFAULT_PORT = 5005
+
+# Ack status codes
+STATUS_APPLIED = 0
+STATUS_STALE = 1
+STATUS_INVALID = 2
+
+DIRECTION_CODES = {
+    'forward': b'f',
+    'backward': b'b',
+    'left': b'l',
+    'right': b'r',
+    'center': b'c',
+    'stop': b's',
+}
+CODE_DIRECTIONS = {code: direction for direction, code in DIRECTION_CODES.items()}
+
+SEQ_MASK = 0xFFFFFFFF
+SEQ_HALF = 0x80000000
+
+
+def seq_newer(seq, last):
+    """True if seq comes after last, allowing for uint32 wrap-around."""
+    return 0 < ((seq - last) & SEQ_MASK) < SEQ_HALF
+
+
+class DriveChannelServer:
+    """
+    UDP drive channel. Each datagram carries one (direction, speed, seq)
+    command; commands older than the last one seen from the same client are
+    dropped, and every datagram is acked with its seq and a status code.
+
+    handler(direction, speed) is called for each fresh command and must
+    return True if the command was valid.
+    """
+
+    def __init__(self, handler, host='0.0.0.0', port=DEFAULT_PORT, session_timeout=2.0):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        # A client that goes quiet for this long starts a new seq session,
+        # so a restarted client isn't stuck behind its old sequence numbers.
+        self.session_timeout = session_timeout
+        self._last_seq = {}
+        self._last_prune = time.monotonic()
+        self._sock = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name='drive-channel', daemon=True)
+        self._thread.start()
+        logger.info(f"Drive channel listening on udp://{self.host}:{self.port}")
+
+    def stop(self):
+        self._running = False
+        if self._sock:
+            self._sock.close()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def _serve(self):
+        while self._running:
+            try:
+                packet, addr = self._sock.recvfrom(64)
+            except OSError:
+                break
+            status, seq = self._process(packet, addr)
+            if seq is None:
+                continue
+            try:
+                self._sock.sendto(ACK.pack(PROTOCOL_VERSION, seq, status), addr)
+            except OSError as e:
+                logger.error(f"Error sending ack to {addr}: {str(e)}")
+
+    def _prune(self, now):
+        # Forget clients quiet for longer than the session timeout; their
+        # next command starts a new session anyway
+        if now - self._last_prune < self.session_timeout:
+            return
+        self._last_prune = now
+        expired = [addr for addr, (_, seen) in self._last_seq.items() if now - seen >= self.session_timeout]
+        for addr in expired:
+            del self._last_seq[addr]
+
+    def _process(self, packet, addr):
+        if len(packet) != COMMAND.size:
+            return STATUS_INVALID, None
+        version, seq, code, speed = COMMAND.unpack(packet)
+        if version != PROTOCOL_VERSION:
+            return STATUS_INVALID, seq
+
+        # Validate before touching the seq window, so a malformed packet
+        # can't make later valid commands look stale
+        direction = CODE_DIRECTIONS.get(code)
+        if direction is None or speed > 100:
+            return STATUS_INVALID, seq
+
+        now = time.monotonic()
+        self._prune(now)
+        last = self._last_seq.get(addr)
+        if last is not None and now - last[1] < self.session_timeout and not seq_newer(seq, last[0]):
+            return STATUS_STALE, seq
+        self._last_seq[addr] = (seq, now)
+        try:
+            ok = self.handler(direction, speed)
+        except Exception as e:
+            logger.error(f"Error in drive channel handler: {str(e)}")
+            return STATUS_INVALID, seq
+        return (STATUS_APPLIED if ok else STATUS_INVALID), seq
+
+
+class DriveChannelClient:
+    """Sends drive commands over the UDP channel and waits for their acks."""
+
+    def __init__(self, host, port=DEFAULT_PORT, timeout=0.1):
+        self.addr = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(self.addr)
+        self._seq = 0
+
+    def send(self, direction, speed, wait_ack=True):
+        """
+        Sends one command. Returns the ack status, or None if no ack arrived
+        before the timeout (or wait_ack is False).
+        """
+        self._seq = (self._seq + 1) & SEQ_MASK
+        seq = self._seq
+        self._sock.send(COMMAND.pack(PROTOCOL_VERSION, seq, DIRECTION_CODES[direction], int(speed)))
+        if not wait_ack:
+            return None
+        while True:
+            try:
+                packet = self._sock.recv(64)
+            except (socket.timeout, ConnectionRefusedError):
+                return None
+            if len(packet) != ACK.size:
+                continue
+            _, ack_seq, status = ACK.unpack(packet)
+            if ack_seq == seq:
+                return status
+            # Late ack for an earlier command; keep waiting for ours.
+
+    def close(self):
+        self._sock.close()
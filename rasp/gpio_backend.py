@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# One recorded hardware transition. kind is 'output', 'pwm_start',
+# 'pwm_duty', 'pwm_frequency' or 'pwm_stop'; t is time.perf_counter().
+GPIOEvent = namedtuple('GPIOEvent', ['t', 'kind', 'pin', 'value'])
+
+
+class SimulatedPWM:
+    def __init__(self, gpio, pin, frequency):
+        self._gpio = gpio
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0
+
+    def start(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+        self._gpio._record('pwm_start', self.pin, duty_cycle)
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+        self._gpio._record('pwm_duty', self.pin, duty_cycle)
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+        self._gpio._record('pwm_frequency', self.pin, frequency)
+
+    def stop(self):
+        self.duty_cycle = 0
+        self._gpio._record('pwm_stop', self.pin, 0)
+
+
+class SimulatedGPIO:
+    """
+    In-memory stand-in for RPi.GPIO. Implements the subset of the API the
+    motor code uses and records every pin and PWM transition with a
+    timestamp, so the motor stack can be load-tested off the robot.
+    """
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self, max_events=100000):
+        self.mode = None
+        self.pins = {}
+        self.pwms = {}
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def _record(self, kind, pin, value):
+        with self._lock:
+            self.events.append(GPIOEvent(time.perf_counter(), kind, pin, value))
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction):
+        self.pins[pin] = self.LOW
+
+    def output(self, pin, level):
+        if pin not in self.pins:
+            raise RuntimeError(f"GPIO {pin} has not been set up as an output")
+        self.pins[pin] = level
+        self._record('output', pin, level)
+
+    def input(self, pin):
+        return self.pins.get(pin, self.LOW)
+
+    def PWM(self, pin, frequency):
+        pwm = SimulatedPWM(self, pin, frequency)
+        self.pwms[pin] = pwm
+        return pwm
+
+    def cleanup(self):
+        self.pins.clear()
+        self.pwms.clear()
+
+    def events_since(self, t):
+        """Returns the recorded events with a timestamp at or after t."""
+        with self._lock:
+            return [event for event in self.events if event.t >= t]
+
+    def clear_events(self):
+        with self._lock:
+            self.events.clear()
+
+
+def load_gpio():
+    """
+    Returns the GPIO module to drive the motors with. Set
+    ROBOT_GPIO_BACKEND=sim to use the in-memory simulator instead of RPi.GPIO.
+    """
+    backend = os.getenv('ROBOT_GPIO_BACKEND', 'rpi').lower()
+    if backend == 'sim':
+        return SimulatedGPIO()
+    if backend != 'rpi':
+        raise ValueError(f"Unknown ROBOT_GPIO_BACKEND: {backend}")
+    import RPi.GPIO as GPIO
+    return GPIO
@@ -0,0 +1,146 @@
+"""
+Load generator for the Pi motor server, run against the simulated GPIO
+backend so it works on any Linux box.
+
+Starts server.py's Flask app in-process, drives /move with joystick-like
+traffic (each distinct command resent several times, the way the client
+resends on every interval tick) and reports request latency, command-to-
+actuation latency and how many hardware writes were coalesced away.
+
+Usage:
+    python loadgen.py --clients 4 --rate 50 --duration 10
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault('ROBOT_GPIO_BACKEND', 'sim')
+
+import logging
+import requests
+from werkzeug.serving import make_server
+
+import server
+from gpio_backend import SimulatedGPIO
+
+PATTERN = [('forward', 40), ('left', 40), ('forward', 60), ('right', 30), ('backward', 50), ('center', 0)]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, samples_ms):
+    if not samples_ms:
+        print(f"{name}: no samples")
+        return
+    print(
+        f"{name}: n={len(samples_ms)} "
+        f"mean={statistics.mean(samples_ms):.2f} ms "
+        f"p50={percentile(samples_ms, 50):.2f} ms "
+        f"p99={percentile(samples_ms, 99):.2f} ms "
+        f"max={max(samples_ms):.2f} ms"
+    )
+
+
+def run_client(url, rate, duration, repeat, results):
+    session = requests.Session()
+    interval = 1.0 / rate if rate else 0
+    latencies = []
+    changes = []  # send timestamps of commands that differ from the previous one
+    errors = 0
+    next_tick = time.perf_counter()
+    end = next_tick + duration
+    i = 0
+    while time.perf_counter() < end:
+        direction, speed = PATTERN[(i // repeat) % len(PATTERN)]
+        start = time.perf_counter()
+        if i % repeat == 0:
+            changes.append(start)
+        try:
+            response = session.post(url, json={'direction': direction, 'speed': speed}, timeout=2.0)
+            if not response.ok:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+        if interval:
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    results.append((latencies, changes, errors))
+
+
+def actuation_latencies(gpio, change_times):
+    """Time from sending a state-changing command to its first GPIO transition."""
+    event_times = [event.t for event in gpio.events]
+    samples = []
+    j = 0
+    for k, sent in enumerate(change_times):
+        limit = change_times[k + 1] if k + 1 < len(change_times) else float('inf')
+        while j < len(event_times) and event_times[j] < sent:
+            j += 1
+        if j < len(event_times) and event_times[j] < limit:
+            samples.append((event_times[j] - sent) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=50.0, help='requests/sec per client, 0 = unthrottled')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--repeat', type=int, default=5, help='times each command is resent')
+    parser.add_argument('--quiet', action='store_true', help='silence server logging and prints')
+    args = parser.parse_args()
+
+    if not isinstance(server.GPIO, SimulatedGPIO):
+        raise SystemExit("loadgen needs ROBOT_GPIO_BACKEND=sim")
+    if args.quiet:
+        logging.disable(logging.CRITICAL)
+        # Shadow print inside the server module only; the report below still prints
+        server.print = lambda *args, **kwargs: None
+
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{httpd.server_port}/move'
+
+    server.GPIO.clear_events()
+    results = []
+    threads = [
+        threading.Thread(target=run_client, args=(url, args.rate, args.duration, args.repeat, results))
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    httpd.shutdown()
+
+    latencies = [sample for result in results for sample in result[0]]
+    errors = sum(result[2] for result in results)
+    print(f"\n{len(latencies)} requests from {args.clients} client(s) in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.0f} req/s, {errors} errors)")
+    summarize("request latency  ", latencies)
+    if args.clients == 1:
+        summarize("actuation latency", actuation_latencies(server.GPIO, results[0][1]))
+    else:
+        print("actuation latency: only measured with --clients 1")
+    stats = server.drivetrain.stats()
+    print(f"hardware writes: {stats['writes_issued']} issued, {stats['writes_skipped']} skipped "
+          f"({stats['skip_ratio']:.0%} coalesced)")
+    scheduler_stats = server.scheduler.stats()
+    print(f"scheduler: {scheduler_stats['applied']} updates applied, "
+          f"{scheduler_stats['superseded']} superseded commands dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import math
+
+CURVES = ('linear', 'exponential')
+
+
+class RampEngine:
+    """
+    Moves signed wheel duties toward their targets at a bounded rate instead
+    of jumping straight to them.
+
+    accel_rate and decel_rate are in duty-cycle percent per second. With the
+    'linear' curve a wheel changes by at most rate * dt per step; with
+    'exponential' it closes a fraction of the remaining gap each step (time
+    constant time_constant_ms), still capped by the rate, so it eases into
+    the target.
+
+    A wheel that has to reverse is ramped down to zero first and held there
+    for one step before it ramps up the other way, so steering changes blend
+    instead of flipping the direction pins at speed.
+    """
+
+    def __init__(self, accel_rate=400.0, decel_rate=None, curve='linear', time_constant_ms=80.0):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown ramp curve: {curve}")
+        if accel_rate <= 0:
+            raise ValueError("accel_rate must be positive")
+        self.accel_rate = accel_rate
+        self.decel_rate = decel_rate if decel_rate else accel_rate
+        self.curve = curve
+        self.time_constant = time_constant_ms / 1000.0
+
+    def _step_one(self, current, target, dt):
+        if current == target:
+            return current
+        if current != 0 and target != 0 and (current > 0) != (target > 0):
+            # Reversal: decelerate toward zero first
+            target = 0
+        speeding_up = abs(target) > abs(current)
+        max_step = (self.accel_rate if speeding_up else self.decel_rate) * dt
+        gap = target - current
+        if self.curve == 'exponential':
+            step = gap * (1 - math.exp(-dt / self.time_constant))
+            # Snap once the remaining gap is below half a duty point
+            if abs(gap - step) < 0.5:
+                step = gap
+        else:
+            step = gap
+        step = max(-max_step, min(max_step, step))
+        return current + step
+
+    def step(self, current, target, dt):
+        """Returns the wheel duties after dt seconds of ramping current toward target."""
+        return tuple(self._step_one(c, t, dt) for c, t in zip(current, target))
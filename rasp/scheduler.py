@@ -0,0 +1,184 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ActuationScheduler:
+    """
+    Applies drive commands from a single thread at a fixed rate.
+
+    submit() only records the command as pending; each tick the scheduler
+    applies the most recent pending command and drops any it superseded,
+    so a flood of requests costs at most one motor update per tick and
+    concurrent requests can no longer interleave their GPIO writes.
+
+    If no command arrives for deadman_ms while the motors are running, the
+    scheduler stops them.
+
+    run_sequence() plays a list of timed steps locally on the scheduler
+    clock and stops the motors after the last one. A newer sequence, a
+    submitted command or stop_now() cancels it.
+
+    With a RampEngine, each tick moves the wheels one ramp step toward the
+    latest target instead of jumping to it. Dead-man and stop_now() stops
+    skip the ramp.
+    """
+
+    STOPPED = (0, 0, 0, 0)
+
+    def __init__(self, apply, rate_hz=50, deadman_ms=1000, ramp=None):
+        self._apply = apply
+        self.ramp = ramp
+        self.period = 1.0 / rate_hz
+        self.deadman = deadman_ms / 1000.0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._current = self.STOPPED
+        self._target = self.STOPPED
+        self._ramped = self.STOPPED  # unrounded ramp state
+        self._last_tick = None
+        self._sequence = None  # (sequence_id, start_time, [(duties, end_offset_s), ...])
+        self._sequence_id = 0
+        self._last_command = time.monotonic()
+        self._running = False
+        self._thread = None
+        self.submitted = 0
+        self.applied = 0
+        self.superseded = 0
+        self.deadman_stops = 0
+        self.sequences_cancelled = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='actuation-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def submit(self, duties):
+        """Queues signed (front_left, front_right, rear_left, rear_right) duties."""
+        with self._lock:
+            if self._pending is not None:
+                self.superseded += 1
+            self._cancel_sequence()
+            self._pending = tuple(duties)
+            self._last_command = time.monotonic()
+            self.submitted += 1
+
+    def run_sequence(self, steps):
+        """
+        Plays [(duties, duration_s), ...] back to back, then stops. Returns
+        the sequence id.
+        """
+        schedule = []
+        offset = 0.0
+        for duties, duration in steps:
+            offset += duration
+            schedule.append((tuple(duties), offset))
+        with self._lock:
+            self._cancel_sequence()
+            self._pending = None
+            self._sequence_id += 1
+            self._sequence = (self._sequence_id, time.monotonic(), schedule)
+            self._last_command = time.monotonic()
+            return self._sequence_id
+
+    def _cancel_sequence(self):
+        # Called with self._lock held
+        if self._sequence is not None:
+            self._sequence = None
+            self.sequences_cancelled += 1
+
+    def active_sequence(self):
+        with self._lock:
+            return self._sequence[0] if self._sequence else None
+
+    def stop_now(self):
+        """Drops any pending command and stops the motors immediately."""
+        with self._lock:
+            if self._pending is not None:
+                self.superseded += 1
+            self._pending = None
+            self._cancel_sequence()
+            self._last_command = time.monotonic()
+            self._actuate(self.STOPPED)
+
+    def _sequence_target(self, now):
+        # Called with self._lock held; returns None once the sequence is over
+        _, start, schedule = self._sequence
+        elapsed = now - start
+        for duties, end in schedule:
+            if elapsed < end:
+                return duties
+        return None
+
+    def _actuate(self, duties):
+        # Called with self._lock held. Jumps straight to duties, bypassing any ramp.
+        self._apply(duties)
+        self._current = self._target = self._ramped = duties
+        self.applied += 1
+
+    def _tick(self):
+        now = time.monotonic()
+        dt = now - self._last_tick if self._last_tick is not None else self.period
+        self._last_tick = now
+        with self._lock:
+            if self._sequence is not None:
+                duties = self._sequence_target(now)
+                if duties is None:
+                    self._sequence = None
+                    duties = self.STOPPED
+                self._target = duties
+                # The sequence runs on the local clock, so it keeps the dead-man fed
+                self._last_command = now
+            elif self._pending is not None:
+                self._target, self._pending = self._pending, None
+            elif self._target != self.STOPPED and now - self._last_command > self.deadman:
+                logger.warning(f"No drive command for {self.deadman * 1000:.0f} ms, stopping motors")
+                self._actuate(self.STOPPED)
+                self.deadman_stops += 1
+                return
+            if self._ramped == self._target:
+                return
+            if self.ramp is None:
+                self._actuate(self._target)
+                return
+            self._ramped = self.ramp.step(self._ramped, self._target, dt)
+            duties = tuple(int(round(duty)) for duty in self._ramped)
+            if duties != self._current:
+                self._apply(duties)
+                self._current = duties
+                self.applied += 1
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while self._running:
+            try:
+                self._tick()
+            except Exception as e:
+                logger.error(f"Error applying drive command: {str(e)}")
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind; don't try to catch up with a burst of ticks
+                next_tick = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'applied': self.applied,
+                'superseded': self.superseded,
+                'deadman_stops': self.deadman_stops,
+                'sequences_cancelled': self.sequences_cancelled,
+                'active_sequence': self._sequence[0] if self._sequence else None,
+                'current_duties': list(self._current),
+                'target_duties': list(self._target),
+            }
@@ -1,23 +1,50 @@
-import RPi.GPIO as GPIO
+import math
 import time
-from flask import Flask, jsonify, request
+import threading
+from flask import Flask, jsonify, request, g, Response
 from flask_cors import CORS
 import logging  # Add this import
+import os
+from drive_channel import DriveChannelServer, DEFAULT_PORT as DRIVE_CHANNEL_PORT
+from gpio_backend import load_gpio
+from scheduler import ActuationScheduler
+from ramp import RampEngine
+from telemetry import Telemetry
+
+# RPi.GPIO on the robot, or the in-memory simulator with ROBOT_GPIO_BACKEND=sim
+GPIO = load_gpio()
 
 # Set up logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Per-request logging is sampled: DRIVE_LOG_SAMPLE=N logs one request in N, 0 turns it off
+telemetry = Telemetry(
+    capacity=int(os.getenv('TELEMETRY_CAPACITY', 512)),
+    log_sample_every=int(os.getenv('DRIVE_LOG_SAMPLE', 0))
+)
+
 # Define the Motor class
 class Motor:
+    """
+    One H-bridge channel. The last level written to each pin and the last
+    duty cycle are cached, so repeated identical commands don't touch the
+    hardware again.
+    """
+
     def __init__(self, in1, in2, en):
         logger.debug(f"Initializing motor with pins: in1={in1}, in2={in2}, en={en}")
         self.in1 = in1
         self.in2 = in2
         self.en = en
+        # Cached hardware state; None means unknown, so the first write always goes out
+        self._levels = {in1: None, in2: None}
+        self._duty = None
+        self.writes_issued = 0
+        self.writes_skipped = 0
         try:
             GPIO.setup(self.in1, GPIO.OUT)
             GPIO.setup(self.in2, GPIO.OUT)
@@ -25,26 +52,94 @@ class Motor:
             logger.debug(f"GPIO setup successful for pins: {in1}, {in2}, {en}")
             self.pwm = GPIO.PWM(self.en, 1000)
             self.pwm.start(0)
+            self._duty = 0
             logger.debug("PWM initialized successfully")
         except Exception as e:
             logger.error(f"Error setting up motor: {str(e)}")
             raise
 
+    def _write_pin(self, pin, level):
+        if self._levels[pin] == level:
+            self.writes_skipped += 1
+            return
+        GPIO.output(pin, level)
+        self._levels[pin] = level
+        self.writes_issued += 1
+
+    def set_duty_cycle(self, duty):
+        if self._duty == duty:
+            self.writes_skipped += 1
+            return
+        self.pwm.ChangeDutyCycle(duty)
+        self._duty = duty
+        self.writes_issued += 1
+
+    def set_direction(self, forward):
+        """forward=None releases the H-bridge (both inputs LOW)."""
+        if forward is None:
+            self._write_pin(self.in1, GPIO.LOW)
+            self._write_pin(self.in2, GPIO.LOW)
+            return
+        self._write_pin(self.in1, GPIO.HIGH if forward else GPIO.LOW)
+        self._write_pin(self.in2, GPIO.LOW if forward else GPIO.HIGH)
+
     def set_speed(self, speed, forward=True):
         try:
-            logger.debug(f"Setting speed to {speed}, forward={forward}")
-            GPIO.output(self.in1, GPIO.HIGH if forward else GPIO.LOW)
-            GPIO.output(self.in2, GPIO.LOW if forward else GPIO.HIGH)
-            self.pwm.ChangeDutyCycle(abs(speed))
-            logger.debug("Speed set successfully")
+            self.set_direction(forward)
+            self.set_duty_cycle(abs(speed))
         except Exception as e:
             logger.error(f"Error setting speed: {str(e)}")
             raise
 
     def stop(self):
-        GPIO.output(self.in1, GPIO.LOW)
-        GPIO.output(self.in2, GPIO.LOW)
-        self.pwm.ChangeDutyCycle(0)  # Stop the motor
+        self.set_direction(None)
+        self.set_duty_cycle(0)  # Stop the motor
+
+    def state(self):
+        return {'in1': self._levels[self.in1], 'in2': self._levels[self.in2], 'duty': self._duty}
+
+
+class DriveTrain:
+    """
+    Owns the four wheel motors and applies their target states as one
+    batched transition: all direction pins first, then all duty cycles, so
+    the wheels change together instead of one motor at a time.
+
+    Duties are signed: positive drives a motor forward (in1 HIGH), negative
+    backward, and 0 stops it.
+    """
+
+    def __init__(self, front_left, front_right, rear_left, rear_right):
+        self.front_left = front_left
+        self.front_right = front_right
+        self.rear_left = rear_left
+        self.rear_right = rear_right
+        self.motors = (front_left, front_right, rear_left, rear_right)
+        self._lock = threading.Lock()
+
+    def apply(self, duties):
+        """Sets (front_left, front_right, rear_left, rear_right) signed duties."""
+        with self._lock:
+            for motor, duty in zip(self.motors, duties):
+                motor.set_direction(duty > 0 if duty else None)
+            for motor, duty in zip(self.motors, duties):
+                motor.set_duty_cycle(abs(duty))
+
+    def stop(self):
+        self.apply((0, 0, 0, 0))
+
+    def motor_states(self):
+        names = ('front_left', 'front_right', 'rear_left', 'rear_right')
+        return {name: motor.state() for name, motor in zip(names, self.motors)}
+
+    def stats(self):
+        issued = sum(motor.writes_issued for motor in self.motors)
+        skipped = sum(motor.writes_skipped for motor in self.motors)
+        return {
+            'writes_issued': issued,
+            'writes_skipped': skipped,
+            'skip_ratio': skipped / (issued + skipped) if issued + skipped else 0.0,
+        }
 
 # Initialize GPIO
 try:
@@ -63,56 +158,123 @@ try:
     front_right_motor = Motor(10, 9, 11)
     rear_left_motor = Motor(5, 6, 13)
     rear_right_motor = Motor(26, 19, 21)
+    drivetrain = DriveTrain(front_left_motor, front_right_motor, rear_left_motor, rear_right_motor)
     logger.info("All motors initialized successfully")
 except Exception as e:
     logger.error(f"Error creating motors: {str(e)}")
     raise
 
-def move_forward(speed):
-    front_left_motor.set_speed(speed, True)
-    front_right_motor.set_speed(speed, True)
-    rear_left_motor.set_speed(speed, True)
-    rear_right_motor.set_speed(speed, True)
-    print(f"Moving forward at speed: {speed}")
-                                   
-def move_backward(speed):
-    front_left_motor.set_speed(speed, False)
-    front_right_motor.set_speed(speed, False)
-    rear_left_motor.set_speed(speed, False)
-    rear_right_motor.set_speed(speed, False)
-    print(f"Moving backward at speed: {speed}")
-
-def turn_right(speed):
-    front_left_motor.set_speed(speed, False)
-    front_right_motor.set_speed(speed, True)
-    rear_left_motor.set_speed(speed, False)
-    rear_right_motor.set_speed(speed, True)
-    print(f"Turning right at speed: {speed}")
-
-def turn_left(speed):
-    front_left_motor.set_speed(speed, True)
-    front_right_motor.set_speed(speed, False)
-    rear_left_motor.set_speed(speed, True)
-    rear_right_motor.set_speed(speed, False)
-    print(f"Turning left at speed: {speed}")
+# Duty-cycle slew rates in %/s; DRIVE_ACCEL_RATE=0 disables ramping
+accel_rate = float(os.getenv('DRIVE_ACCEL_RATE', 400))
+ramp = RampEngine(
+    accel_rate=accel_rate,
+    decel_rate=float(os.getenv('DRIVE_DECEL_RATE', 0)) or None,
+    curve=os.getenv('DRIVE_RAMP_CURVE', 'linear')
+) if accel_rate > 0 else None
+
+def apply_duties(duties):
+    drivetrain.apply(duties)
+    telemetry.record_actuation(duties)
+
+# All motor updates go through the scheduler thread, one batched update per tick
+scheduler = ActuationScheduler(
+    apply_duties,
+    rate_hz=float(os.getenv('DRIVE_RATE_HZ', 50)),
+    deadman_ms=float(os.getenv('DRIVE_DEADMAN_MS', 1000)),
+    ramp=ramp
+)
+scheduler.start()
 
 def stop_all_motors():
-    front_left_motor.stop()
-    front_right_motor.stop()
-    rear_left_motor.stop()
-    rear_right_motor.stop()
+    scheduler.stop_now()
     print("All motors stopped.")
 
+# The motors are wired reversed: positive duty drives the robot backward
+MOTOR_POLARITY = -1
+
+# Commands at or below this speed (0-100) stop the robot
+DEADBAND = 10
+
+def mix_drive(linear, angular, max_speed=100):
+    """
+    Differential-drive mixing. linear is forward velocity and angular is
+    counter-clockwise (left) turn rate, both in [-1, 1]. Returns the signed
+    (front_left, front_right, rear_left, rear_right) duties, scaled so the
+    faster side runs at no more than max_speed.
+    """
+    left = linear - angular
+    right = linear + angular
+    scale = max(1.0, abs(left), abs(right))
+    left_duty = int(round(MOTOR_POLARITY * left / scale * max_speed))
+    right_duty = int(round(MOTOR_POLARITY * right / scale * max_speed))
+    return (left_duty, right_duty, left_duty, right_duty)
+
+# (linear, angular) for the discrete directions sent to /move
+DIRECTION_VECTORS = {
+    "forward": (1, 0),
+    "backward": (-1, 0),
+    "left": (0, 1),
+    "right": (0, -1),
+}
+
+def direction_duties(direction, speed):
+    """Wheel duties for a discrete (direction, speed) command, or None if the direction is unknown."""
+    if direction in ("center", "stop"):
+        return ActuationScheduler.STOPPED
+    vector = DIRECTION_VECTORS.get(direction)
+    if vector is None:
+        return None
+    if speed <= DEADBAND:
+        return ActuationScheduler.STOPPED
+    return mix_drive(*vector, max_speed=speed)
+
+def submit_duties(duties, source):
+    telemetry.record_command(source, duties)
+    scheduler.submit(duties)
+
+def execute_move(direction, speed, source='http'):
+    """
+    Queues the motor update for a (direction, speed) command. Shared by the
+    HTTP /move endpoint and the UDP drive channel. Returns False for an
+    unknown direction.
+    """
+    duties = direction_duties(direction, speed)
+    if duties is None:
+        return False
+    submit_duties(duties, source)
+    return True
+
+def execute_drive(linear, angular, max_speed=100):
+    """Queues one batched update for a continuous (linear, angular) command."""
+    if math.hypot(linear, angular) * max_speed <= DEADBAND:
+        duties = ActuationScheduler.STOPPED
+    else:
+        duties = mix_drive(linear, angular, max_speed)
+    submit_duties(duties, 'drive')
+    return duties
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unknown'
+        telemetry.record_request(endpoint, (time.perf_counter() - start) * 1000)
+    return response
+
 @app.route('/move', methods=['POST'])
 def handle_move():
-    logger.info('Received POST request to /move')
     try:
         data = request.get_json()
-        logger.debug(f"Received data: {data}")
+        if telemetry.should_log():
+            logger.info(f"POST /move {data}")
         
         if not data or 'speed' not in data or 'direction' not in data:
             logger.error("Missing speed or direction in request")
@@ -120,22 +282,11 @@ def handle_move():
         
         speed = int(data['speed'])
         direction = data['direction'].lower()
-        logger.debug(f"Processing movement: direction={direction}, speed={speed}")
 
         if not (0 <= speed <= 100):
             return jsonify({'error': 'Speed must be between 0 and 100'}), 400
 
-        if direction == "center" or speed <= 10:
-            stop_all_motors()
-        elif direction == "forward":
-            move_backward(speed) # the directions are reversed
-        elif direction == "backward":
-            move_forward(speed)
-        elif direction == "left":
-            turn_left(speed)
-        elif direction == "right":
-            turn_right(speed)
-        else:
+        if not execute_move(direction, speed):
             return jsonify({'error': 'Invalid direction'}), 400
 
         return jsonify({'status': 'success', 'message': f'Moving {direction} at speed {speed}'})
@@ -144,6 +295,88 @@ def handle_move():
         logger.error(f"Error in handle_move: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/drive', methods=['POST'])
+def handle_drive():
+    """
+    Continuous drive command. Accepts either the raw joystick vector
+    {"x": right, "y": forward} or {"linear": ..., "angular": ...}, each in
+    [-1, 1], plus an optional "max_speed" (0-100).
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'Missing drive command'}), 400
+
+        if 'linear' in data or 'angular' in data:
+            linear = float(data.get('linear', 0))
+            angular = float(data.get('angular', 0))
+        elif 'x' in data or 'y' in data:
+            # Joystick x is positive to the right; angular is positive to the left
+            linear = float(data.get('y', 0))
+            angular = -float(data.get('x', 0))
+        else:
+            return jsonify({'error': 'Expected x/y or linear/angular'}), 400
+
+        max_speed = float(data.get('max_speed', 100))
+        if not (0 <= max_speed <= 100):
+            return jsonify({'error': 'max_speed must be between 0 and 100'}), 400
+        if not (-1 <= linear <= 1 and -1 <= angular <= 1):
+            return jsonify({'error': 'Drive components must be between -1 and 1'}), 400
+
+        duties = execute_drive(linear, angular, max_speed)
+        return jsonify({'status': 'success', 'duties': list(duties)})
+
+    except Exception as e:
+        logger.error(f"Error in handle_drive: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+# Limits for /sequence so a bad request can't tie up the motors for long
+MAX_SEQUENCE_STEPS = 50
+MAX_STEP_DURATION_MS = 10000
+
+@app.route('/sequence', methods=['POST'])
+def handle_sequence():
+    """
+    Runs a scripted maneuver with local timing on the Pi:
+    {"steps": [{"direction": "right", "speed": 15, "duration_ms": 200}, ...]}.
+    The motors stop after the last step. A newer sequence, /move, /drive or
+    /stop cancels it. Step timing has the scheduler's tick resolution.
+    """
+    try:
+        data = request.get_json()
+        steps = data.get('steps') if data else None
+        if not steps or not isinstance(steps, list):
+            return jsonify({'error': 'Missing steps'}), 400
+        if len(steps) > MAX_SEQUENCE_STEPS:
+            return jsonify({'error': f'At most {MAX_SEQUENCE_STEPS} steps allowed'}), 400
+
+        schedule = []
+        for step in steps:
+            if 'direction' not in step or 'duration_ms' not in step:
+                return jsonify({'error': 'Each step needs a direction and duration_ms'}), 400
+            speed = int(step.get('speed', 0))
+            duration_ms = int(step['duration_ms'])
+            if not (0 <= speed <= 100):
+                return jsonify({'error': 'Speed must be between 0 and 100'}), 400
+            if not (0 <= duration_ms <= MAX_STEP_DURATION_MS):
+                return jsonify({'error': f'duration_ms must be between 0 and {MAX_STEP_DURATION_MS}'}), 400
+            duties = direction_duties(step['direction'].lower(), speed)
+            if duties is None:
+                return jsonify({'error': f"Invalid direction: {step['direction']}"}), 400
+            schedule.append((duties, duration_ms / 1000.0))
+
+        telemetry.record_command('sequence', schedule[0][0])
+        sequence_id = scheduler.run_sequence(schedule)
+        return jsonify({
+            'status': 'success',
+            'sequence_id': sequence_id,
+            'duration_ms': sum(duration for _, duration in schedule) * 1000
+        })
+
+    except Exception as e:
+        logger.error(f"Error in handle_sequence: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/stop', methods=['POST'])
 def handle_stop():
     try:
@@ -152,8 +385,42 @@ def handle_stop():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/stats', methods=['GET'])
+def handle_stats():
+    return jsonify({**drivetrain.stats(), 'scheduler': scheduler.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def handle_metrics():
+    """
+    Telemetry as JSON, or in Prometheus text format with ?format=prometheus
+    (or an Accept header asking for text/plain).
+    """
+    drivetrain_stats = drivetrain.stats()
+    scheduler_stats = scheduler.stats()
+    wants_text = request.args.get('format') == 'prometheus' or (
+        request.accept_mimetypes.best == 'text/plain'
+    )
+    if wants_text:
+        counters = {
+            'gpio_writes_issued_total': drivetrain_stats['writes_issued'],
+            'gpio_writes_skipped_total': drivetrain_stats['writes_skipped'],
+            'scheduler_applied_total': scheduler_stats['applied'],
+            'scheduler_superseded_total': scheduler_stats['superseded'],
+            'scheduler_deadman_stops_total': scheduler_stats['deadman_stops'],
+        }
+        body = telemetry.render_prometheus(drivetrain.motor_states(), counters)
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+    return jsonify({
+        **telemetry.snapshot(),
+        'motors': drivetrain.motor_states(),
+        'drivetrain': drivetrain_stats,
+        'scheduler': scheduler_stats,
+    })
+
 def cleanup():
-    stop_all_motors()
+    scheduler.stop()
+    drivetrain.stop()
     GPIO.cleanup()
 
 if __name__ == "__main__":
@@ -161,6 +428,13 @@ if __name__ == "__main__":
         # Register cleanup handler
         import atexit
         atexit.register(cleanup)
+
+        # Start the low-latency UDP drive channel alongside the HTTP API
+        drive_channel = DriveChannelServer(
+            lambda direction, speed: execute_move(direction, speed, source='udp'),
+            port=int(os.getenv('DRIVE_CHANNEL_PORT', DRIVE_CHANNEL_PORT))
+        )
+        drive_channel.start()
         
         # Run the Flask app
         app.run(host='0.0.0.0', port=5000)
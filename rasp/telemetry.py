@@ -0,0 +1,149 @@
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Seconds of per-second command counts kept for commands_per_sec()
+RATE_WINDOW_S = 60
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        for bound, cumulative in zip(self.buckets, itertools.accumulate(self.counts)):
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else None,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'buckets': {str(bound): n for bound, n in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+
+class Telemetry:
+    """
+    Cheap in-memory instrumentation for the motor server: fixed-size ring
+    buffers of recent commands and actuations, per-second command counts
+    and per-endpoint latency histograms. Recording is a deque append or a
+    couple of integer increments, so it can stay on in the hot path.
+
+    The command rate comes from the per-second counts, not the ring
+    buffer, so it isn't capped by the buffer's capacity.
+
+    log_sample_every controls request logging: 0 disables it, N logs one
+    request in N.
+    """
+
+    def __init__(self, capacity=512, log_sample_every=0):
+        self.started = time.time()
+        self.commands = deque(maxlen=capacity)
+        self.actuations = deque(maxlen=capacity)
+        self.endpoints = {}
+        self.command_count = 0
+        self._command_seconds = deque(maxlen=RATE_WINDOW_S)  # [monotonic second, count]
+        self.log_sample_every = log_sample_every
+        self._log_counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def should_log(self):
+        if not self.log_sample_every:
+            return False
+        return next(self._log_counter) % self.log_sample_every == 0
+
+    def record_request(self, endpoint, ms):
+        with self._lock:
+            histogram = self.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoints[endpoint] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def record_command(self, source, duties):
+        now = time.time()
+        second = int(time.monotonic())
+        with self._lock:
+            self.commands.append((now, source, tuple(duties)))
+            self.command_count += 1
+            if self._command_seconds and self._command_seconds[-1][0] == second:
+                self._command_seconds[-1][1] += 1
+            else:
+                self._command_seconds.append([second, 1])
+
+    def record_actuation(self, duties):
+        self.actuations.append((time.time(), tuple(duties)))
+
+    def commands_per_sec(self, window=5):
+        """Average rate over the last window whole seconds, leaving out the one in progress."""
+        window = max(1, min(int(window), RATE_WINDOW_S - 1))
+        current = int(time.monotonic())
+        with self._lock:
+            recent = sum(count for second, count in self._command_seconds
+                         if current - window <= second < current)
+        return recent / window
+
+    def snapshot(self, recent=20):
+        with self._lock:
+            endpoints = {name: histogram.to_dict() for name, histogram in self.endpoints.items()}
+        return {
+            'uptime_s': time.time() - self.started,
+            'commands_total': self.command_count,
+            'commands_per_sec': self.commands_per_sec(),
+            'endpoints': endpoints,
+            'recent_commands': [
+                {'t': t, 'source': source, 'duties': list(duties)}
+                for t, source, duties in list(self.commands)[-recent:]
+            ],
+            'recent_actuations': [
+                {'t': t, 'duties': list(duties)} for t, duties in list(self.actuations)[-recent:]
+            ],
+        }
+
+    def render_prometheus(self, motors, counters):
+        """
+        Prometheus text exposition. motors maps a motor name to its state
+        dict; counters maps a metric name to a number.
+        """
+        lines = [
+            '# TYPE robot_commands_total counter',
+            f'robot_commands_total {self.command_count}',
+            '# TYPE robot_commands_per_second gauge',
+            f'robot_commands_per_second {self.commands_per_sec():.3f}',
+            '# TYPE robot_request_duration_ms histogram',
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.endpoints.items()):
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += n
+                    lines.append(f'robot_request_duration_ms_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'robot_request_duration_ms_sum{{endpoint="{name}"}} {histogram.total_ms:.3f}')
+                lines.append(f'robot_request_duration_ms_count{{endpoint="{name}"}} {histogram.count}')
+        lines.append('# TYPE robot_motor_duty_cycle gauge')
+        for name, state in motors.items():
+            lines.append(f'robot_motor_duty_cycle{{motor="{name}"}} {state["duty"] or 0}')
+        for name, value in counters.items():
+            lines.append(f'# TYPE robot_{name} counter')
+            lines.append(f'robot_{name} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,123 @@
+"""
+Ramp timing against the simulated GPIO backend.
+
+The scheduler is ticked by hand on a fake clock, which also timestamps
+the SimulatedGPIO events, so the timings checked here are exact rather
+than at the mercy of thread scheduling.
+"""
+import os
+
+os.environ['ROBOT_GPIO_BACKEND'] = 'sim'
+
+import pytest
+
+import gpio_backend
+import scheduler as scheduler_module
+import server
+from ramp import RampEngine
+from scheduler import ActuationScheduler
+
+PERIOD = 0.02
+FORWARD = (100, 100, 100, 100)
+BACKWARD = (-100, -100, -100, -100)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', clock)
+    monkeypatch.setattr(gpio_backend.time, 'perf_counter', clock)
+    return clock
+
+
+@pytest.fixture
+def gpio(clock):
+    server.drivetrain.stop()
+    server.GPIO.clear_events()
+    yield server.GPIO
+    server.drivetrain.stop()
+
+
+def make_scheduler(**ramp_options):
+    return ActuationScheduler(server.drivetrain.apply, rate_hz=1 / PERIOD, deadman_ms=60000,
+                              ramp=RampEngine(**ramp_options))
+
+
+def run(scheduler, clock, seconds):
+    for _ in range(int(round(seconds / PERIOD))):
+        clock.now += PERIOD
+        scheduler._tick()
+
+
+def duty_reached(gpio, pin, duty):
+    """Timestamp of the first recorded duty change on pin to duty."""
+    for event in gpio.events:
+        if event.kind == 'pwm_duty' and event.pin == pin and event.value == duty:
+            return event.t
+    return None
+
+
+def en_pins():
+    return [motor.en for motor in server.drivetrain.motors]
+
+
+def test_accel_takes_accel_rate(clock, gpio):
+    scheduler = make_scheduler(accel_rate=400)
+    start = clock.now
+    scheduler.submit(FORWARD)
+    run(scheduler, clock, 0.5)
+
+    for pin in en_pins():
+        duties = [event.value for event in gpio.events if event.kind == 'pwm_duty' and event.pin == pin]
+        assert duties == sorted(duties), "duty should only rise while accelerating"
+        # 0 -> 100% at 400 %/s takes 250 ms, to within one tick
+        assert duty_reached(gpio, pin, 100) - start == pytest.approx(0.25, abs=PERIOD)
+
+
+def test_decel_follows_decel_rate(clock, gpio):
+    scheduler = make_scheduler(accel_rate=1000, decel_rate=200)
+    scheduler.submit(FORWARD)
+    run(scheduler, clock, 0.2)
+    assert [motor.state()['duty'] for motor in server.drivetrain.motors] == [100] * 4
+
+    start = clock.now
+    scheduler.submit(ActuationScheduler.STOPPED)
+    run(scheduler, clock, 1.0)
+
+    for pin in en_pins():
+        # 100 -> 0% at 200 %/s takes 500 ms, to within one tick
+        assert duty_reached(gpio, pin, 0) - start == pytest.approx(0.5, abs=PERIOD)
+
+
+def test_reversal_releases_pins_at_zero_before_flipping(clock, gpio):
+    # 9% per tick on the way down, so a ramp that ignored the reversal would step over zero
+    scheduler = make_scheduler(accel_rate=1000, decel_rate=450)
+    scheduler.submit(FORWARD)
+    run(scheduler, clock, 0.2)
+    gpio.clear_events()
+
+    scheduler.submit(BACKWARD)
+    run(scheduler, clock, 0.5)
+
+    for motor in server.drivetrain.motors:
+        events = list(gpio.events)
+        stopped_at = duty_reached(gpio, motor.en, 0)
+        released_at = next(event.t for event in events
+                           if event.kind == 'output' and event.pin == motor.in1 and event.value == gpio.LOW)
+        flipped_at = next(event.t for event in events
+                          if event.kind == 'output' and event.pin == motor.in2 and event.value == gpio.HIGH)
+        assert stopped_at is not None and released_at <= stopped_at
+        # The wheel sits at zero with both pins low for at least a tick before reversing
+        assert flipped_at >= stopped_at + PERIOD
+        reversed_duties = [event.value for event in events
+                           if event.kind == 'pwm_duty' and event.pin == motor.en and event.t >= flipped_at]
+        assert reversed_duties[-1] == 100
+        assert motor.state() == {'in1': gpio.LOW, 'in2': gpio.HIGH, 'duty': 100}
@@ -15,8 +15,11 @@ import tempfile
 import sys
 import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'voice'))
-from voice import get_gemini_chat_response, speak_text, transcribe_speech_to_text, generate_lipsync_video
+from voice import get_gemini_chat_response, speak_text, synthesize_speech, transcribe_speech_to_text, generate_lipsync_video, new_conversation_context
+from sessions import SessionStore
 
 # Load environment variables
 load_dotenv()
@@ -33,11 +36,25 @@ CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:3000"],
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"]
+        "allow_headers": ["Content-Type", "X-Session-Id"]
     }
 })
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Runs the slow tail of /handle_voice (TTS, playback, lip-sync) after the
+# response has been sent
+voice_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='voice')
+
+# Per-operator voice state (conversation context, pending videos), keyed by
+# the client's session id; idle sessions are dropped after SESSION_TTL seconds
+sessions = SessionStore(new_conversation_context, ttl=int(os.getenv('SESSION_TTL', '1800')))
+
+def request_session_id(data=None):
+    """Session id from the JSON body, the X-Session-Id header or the session_id query parameter."""
+    return ((data or {}).get('session_id')
+            or request.headers.get('X-Session-Id')
+            or request.args.get('session_id'))
+
 # MongoDB connection
 uri = os.getenv('MONGODB_URI')
 client = MongoClient(uri, tlsAllowInvalidCertificates=True)
@@ -221,9 +238,40 @@ def login():
     else:
         return jsonify({"error": "Invalid username or password"}), 401
 
+def publish_video_url(session, video_filename):
+    """Hands a finished lip-sync video to the session's /video-stream."""
+    session.push_video_url(f'http://localhost:5001/static/videos/{video_filename}')
+
+def render_voice_reply(session, ai_response, started):
+    """
+    Synthesizes the reply once, then plays it and renders the lip-sync
+    video from the same audio in parallel. The video URL goes out over
+    /video-stream when it is ready. The caller has marked the session as
+    rendering with begin_render(); this ends it.
+    """
+    try:
+        try:
+            audio = synthesize_speech(ai_response)
+        except Exception as e:
+            print(f'Error generating voice response: {e}')
+            return
+        print(f'handle_voice: TTS ready after {time.time() - started:.2f}s')
+
+        # Play the voice response while the video renders
+        threading.Thread(target=speak_text, args=(ai_response, audio), daemon=True).start()
+
+        # Generate lip-sync video using Gooey.ai
+        video_filename = generate_lipsync_video(ai_response, audio)
+        if video_filename:
+            publish_video_url(session, video_filename)
+            print(f'handle_voice: video ready after {time.time() - started:.2f}s')
+    finally:
+        session.end_render()
+
 @app.route('/handle_voice', methods=['POST'])
 def handle_voice():
     print('handle_voice called')
+    started = time.time()
     try:
         data = request.json
         if not data or 'audio' not in data:
@@ -236,29 +284,34 @@ def handle_voice():
             print('Failed to process audio')
             return jsonify({'error': 'Failed to process audio'}), 400
 
-        # Get AI response using Gemini
-        ai_response = get_gemini_chat_response(transcript)
+        # Get AI response using Gemini, in this session's own context. The
+        # session lock keeps one operator's turns in order; other sessions
+        # aren't blocked.
+        session = sessions.get(request_session_id(data))
+        with session.lock:
+            ai_response = get_gemini_chat_response(transcript, session.context)
         if not ai_response:
             print('Failed to get AI response')
             return jsonify({'error': 'Failed to get AI response'}), 400
+        print(f'handle_voice: reply ready after {time.time() - started:.2f}s')
 
-        # Generate lip-sync video using Gooey.ai
-        video_filename = generate_lipsync_video(ai_response)
-        if video_filename:
-            # Store the video URL for the event stream
-            app.current_video_url = f'http://localhost:5001/static/videos/{video_filename}'
-            
-        # Generate voice response using ElevenLabs
+        # TTS, playback and lip-sync continue in the background; the video
+        # URL is pushed over /video-stream once it exists. Until then the
+        # session is kept out of the TTL sweep.
+        session.begin_render()
         try:
-            speak_text(ai_response)
-        except Exception as e:
-            print(f'Error generating voice response: {e}')
-            
+            voice_executor.submit(render_voice_reply, session, ai_response, started)
+        except Exception:
+            session.end_render()
+            raise
+
         return jsonify({
             'success': True,
             'transcript': transcript,
             'response': ai_response,
-            'videoUrl': app.current_video_url if hasattr(app, 'current_video_url') else None
+            'videoUrl': None,
+            'videoPending': True,
+            'sessionId': session.session_id
         })
     except Exception as e:
         print(f"Error processing voice: {str(e)}")
@@ -266,17 +319,26 @@ def handle_voice():
 
 @app.route('/video-stream')
 def video_stream():
+    session = sessions.get(request_session_id())
+
     def generate():
-        while True:
-            # Check if there's a new video
-            if hasattr(app, 'current_video_url'):
+        # An attached stream keeps the session from being evicted
+        session.attach_stream()
+        try:
+            while True:
+                # Wait for this session's next video
+                video_url = session.wait_video_url(timeout=15)
+                session.touch()
+                if video_url is None:
+                    # Comment line so proxies don't drop an idle stream
+                    yield ": keepalive\n\n"
+                    continue
                 data = json.dumps({
-                    'videoUrl': app.current_video_url
+                    'videoUrl': video_url
                 })
                 yield f"data: {data}\n\n"
-                # Clear the current video URL
-                delattr(app, 'current_video_url')
-            time.sleep(0.1)
+        finally:
+            session.detach_stream()
 
     return Response(generate(), mimetype='text/event-stream')
 
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import deque
+
+DEFAULT_SESSION_ID = 'default'
+
+
+class Session:
+    """
+    Voice state for one operator: their conversation context, lip-sync
+    video URLs waiting to go out over /video-stream, and a lock that keeps
+    their own turns in order without blocking other sessions.
+    """
+
+    def __init__(self, session_id, context):
+        self.session_id = session_id
+        self.context = context
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.streams = 0
+        self.renders = 0
+        self._video_urls = deque(maxlen=8)
+        self._video_ready = threading.Condition()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def attach_stream(self):
+        with self._video_ready:
+            self.streams += 1
+
+    def detach_stream(self):
+        with self._video_ready:
+            self.streams -= 1
+
+    def begin_render(self):
+        """Marks a background reply render as running; the session isn't evicted until end_render()."""
+        with self._video_ready:
+            self.renders += 1
+
+    def end_render(self):
+        with self._video_ready:
+            self.renders -= 1
+        self.touch()
+
+    def busy(self):
+        with self._video_ready:
+            return self.streams > 0 or self.renders > 0
+
+    def push_video_url(self, url):
+        with self._video_ready:
+            self._video_urls.append(url)
+            self._video_ready.notify_all()
+
+    def wait_video_url(self, timeout):
+        """Returns the oldest pending video URL, waiting up to timeout seconds; None if none arrived."""
+        with self._video_ready:
+            self._video_ready.wait_for(lambda: self._video_urls, timeout)
+            return self._video_urls.popleft() if self._video_urls else None
+
+
+class SessionStore:
+    """
+    Sessions keyed by session (or user) id, created on first use.
+
+    Sessions idle for longer than ttl seconds are evicted, except while a
+    /video-stream client is attached to them or a reply is still rendering
+    for them, so a finished video always lands on the live session. Eviction runs lazily from
+    get(), at most once every sweep_interval seconds. The store lock only
+    guards the dict; per-session work happens under each session's own
+    lock.
+    """
+
+    def __init__(self, context_factory, ttl=1800, sweep_interval=60):
+        self.context_factory = context_factory
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def get(self, session_id=None):
+        session_id = session_id or DEFAULT_SESSION_ID
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self.context_factory())
+        session.touch()
+        return session
+
+    def _sweep(self, now):
+        # Called with self._lock held
+        self._last_sweep = now
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if now - session.last_seen > self.ttl and not session.busy()
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+        self.evicted += len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'streaming': sum(1 for session in self._sessions.values() if session.streams),
+                'rendering': sum(1 for session in self._sessions.values() if session.renders),
+                'evicted': self.evicted,
+            }
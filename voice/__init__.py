@@ -1,8 +1,10 @@
-from .voice import get_gemini_chat_response, speak_text, transcribe_speech_to_text, generate_lipsync_video
+from .voice import get_gemini_chat_response, speak_text, synthesize_speech, transcribe_speech_to_text, generate_lipsync_video, new_conversation_context
 
 __all__ = [
     'get_gemini_chat_response',
     'speak_text',
+    'synthesize_speech',
     'transcribe_speech_to_text',
-    'generate_lipsync_video'
+    'generate_lipsync_video',
+    'new_conversation_context'
 ] 
\ No newline at end of file
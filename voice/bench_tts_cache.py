@@ -0,0 +1,87 @@
+"""
+Hit rate and latency of the TTS cache on a synthetic reply stream, using
+FakeTTSProvider so no ElevenLabs key is needed.
+
+    python voice/bench_tts_cache.py --replies 200 --latency 0.05
+
+Replies are drawn from a small set of stock phrases (greetings, errors,
+acknowledgements) with probability --repeat-share and are otherwise
+unique. The run is repeated with a cold cache directory, then again with
+the disk tier from the first run but an empty memory tier (a server
+restart).
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from tts_cache import FakeTTSProvider, TTSCache
+
+STOCK_PHRASES = [
+    "Hi there! How can I help you today?",
+    "I encountered an error. Please try again.",
+    "Sure, moving forward now.",
+    "Okay, stopping the robot.",
+    "Turning left.",
+    "Turning right.",
+    "Got it!",
+    "Goodbye! Have a great day!",
+]
+
+
+def reply_stream(count, repeat_share, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < repeat_share:
+            # Skewed toward the first phrases, like real small talk
+            yield STOCK_PHRASES[min(int(rng.expovariate(0.6)), len(STOCK_PHRASES) - 1)]
+        else:
+            yield f"Here is a unique answer number {i}."
+
+
+def run(cache, replies):
+    samples = []
+    for text in replies:
+        start = time.perf_counter()
+        cache.get(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name, cache, samples):
+    stats = cache.stats()
+    ordered = sorted(samples)
+    print(f"{name:>14}: hit rate {stats['hit_rate']:6.1%} ({stats['memory_hits']} memory, "
+          f"{stats['disk_hits']} disk, {stats['misses']} synthesized)  "
+          f"p50 {statistics.median(ordered):7.2f} ms  p95 {ordered[int(len(ordered) * 0.95)]:7.2f} ms  "
+          f"mean {statistics.mean(ordered):7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replies', type=int, default=200)
+    parser.add_argument('--repeat-share', type=float, default=0.6, help='fraction of replies that are stock phrases')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per fake synthesis')
+    parser.add_argument('--memory-items', type=int, default=64)
+    args = parser.parse_args()
+
+    replies = list(reply_stream(args.replies, args.repeat_share))
+    uncached = FakeTTSProvider(latency=args.latency)
+    samples = []
+    for text in replies:
+        start = time.perf_counter()
+        uncached.synthesize(text)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{'no cache':>14}: {uncached.calls} syntheses  p50 {statistics.median(samples):7.2f} ms  "
+          f"mean {statistics.mean(samples):7.2f} ms")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = TTSCache(FakeTTSProvider(latency=args.latency), cache_dir, memory_items=args.memory_items)
+        report('cold', cache, run(cache, replies))
+        restarted = TTSCache(FakeTTSProvider(latency=args.latency), cache_dir, memory_items=args.memory_items)
+        report('after restart', restarted, run(restarted, replies))
+
+
+if __name__ == '__main__':
+    main()
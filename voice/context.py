@@ -0,0 +1,142 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by every context, so summaries never run on the reply path
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='context-summary')
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), without a tokenizer round trip."""
+    return max(1, len(text) // 4)
+
+
+class ConversationContext:
+    """
+    Bounded conversation history for one session.
+
+    Keeps the system prompt plus a sliding window of the most recent
+    messages that fits in token_budget tokens and max_messages messages;
+    older messages fall out of the window. With a summarize callable
+    (summarize(previous_summary, messages) -> str), messages that fall out
+    are folded into a rolling summary, in batches of summarize_every
+    messages, that is sent ahead of the window and capped at
+    summary_budget tokens. Without one they are dropped. Summaries are
+    made on a background worker, one at a time per context, without the
+    context lock held, so adding a message never waits on the model. A
+    batch whose summary fails is kept and retried with the next fold.
+
+    Either way the prompt built by messages() stays under system prompt +
+    summary_budget + token_budget tokens however long the session runs
+    (plus the newest message, which is always kept), and so does the
+    memory the context holds.
+    """
+
+    def __init__(self, system_prompt, token_budget=1000, max_messages=20, summarize=None,
+                 summarize_every=4, summary_budget=200):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summarize = summarize
+        self.summarize_every = summarize_every
+        self.summary_budget = summary_budget
+        self.max_pending = max(4 * max_messages, summarize_every)
+        self.summary = None
+        self._window = []  # [(role, content, tokens)]
+        self._evicted = []
+        self._folding = False
+        self._generation = 0  # bumped by clear() so stale summaries are discarded
+        self._lock = threading.Lock()
+        self.turns = 0
+
+    def _window_tokens(self):
+        return sum(tokens for _, _, tokens in self._window)
+
+    def _fixed_tokens(self):
+        tokens = estimate_tokens(self.system_prompt)
+        if self.summary:
+            tokens += estimate_tokens(self.summary)
+        return tokens
+
+    def add(self, role, content):
+        """Appends a message and slides the window back under budget."""
+        with self._lock:
+            self._window.append((role, content, estimate_tokens(content)))
+            if role == 'user':
+                self.turns += 1
+            # Always keep the newest message, even if it alone is over budget
+            while len(self._window) > 1 and (
+                    len(self._window) > self.max_messages
+                    or self._window_tokens() > self.token_budget):
+                role, content, _ = self._window.pop(0)
+                if self.summarize is not None:
+                    self._evicted.append({'role': role, 'content': content})
+            self._schedule_fold()
+
+    def add_user(self, content):
+        self.add('user', content)
+
+    def add_assistant(self, content):
+        self.add('assistant', content)
+
+    def _schedule_fold(self):
+        # Called with self._lock held
+        if self.summarize is None or self._folding or len(self._evicted) < self.summarize_every:
+            return
+        evicted, self._evicted = self._evicted, []
+        self._folding = True
+        _summary_executor.submit(self._fold_evicted, self.summary, evicted, self._generation)
+
+    def _fold_evicted(self, previous_summary, evicted, generation):
+        # Runs on the summary worker; only the result is applied under the lock
+        try:
+            summary = self.summarize(previous_summary, evicted)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            with self._lock:
+                if generation == self._generation:
+                    self._folding = False
+                    self._requeue(evicted)
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._folding = False
+            if summary:
+                # Cap the summary so it can't grow the prompt without bound either
+                self.summary = summary.strip()[:self.summary_budget * 4]
+            # Messages evicted while this summary was being made
+            self._schedule_fold()
+
+    def _requeue(self, evicted):
+        # Called with self._lock held. Puts a failed batch back ahead of
+        # newer evictions; the next add() retries it along with the previous
+        # summary, which was left as it was. Only the newest max_pending
+        # messages are kept, so a summarizer that keeps failing can't grow
+        # the context without bound.
+        self._evicted[:0] = evicted
+        overflow = len(self._evicted) - self.max_pending
+        if overflow > 0:
+            print(f"Summarizer keeps failing, dropping {overflow} oldest messages")
+            del self._evicted[:overflow]
+
+    def messages(self):
+        """System prompt, rolling summary (if any) and the current window, oldest first."""
+        with self._lock:
+            messages = [{'role': 'assistant', 'content': self.system_prompt}]
+            if self.summary:
+                messages.append({'role': 'assistant', 'content': f"Summary of the earlier conversation: {self.summary}"})
+            messages.extend({'role': role, 'content': content} for role, content, _ in self._window)
+            return messages
+
+    def prompt_tokens(self):
+        with self._lock:
+            return self._fixed_tokens() + self._window_tokens()
+
+    def clear(self):
+        with self._lock:
+            self._window = []
+            self._evicted = []
+            self.summary = None
+            self.turns = 0
+            self._generation += 1
+            self._folding = False
@@ -0,0 +1,198 @@
+"""
+Persistent cache of rendered lip-sync videos.
+
+    python voice/lipsync_cache.py prewarm [--phrases phrases.txt]
+    python voice/lipsync_cache.py stats
+
+prewarm renders each phrase (one per line, or a built-in list of stock
+replies) through generate_lipsync_video() so later replies with the same
+text come straight from the cache. It needs the same API keys as voice.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_VIDEOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server', 'static', 'videos')
+INDEX_FILENAME = 'lipsync_index.json'
+
+STOCK_PHRASES = [
+    "Hi there! How can I help you today?",
+    "I encountered an error. Please try again.",
+    "Sure, I can help with that.",
+    "Goodbye! Have a great day!",
+]
+
+
+class LipsyncCache:
+    """
+    Maps (reply text, voice, TTS model, avatar content hash) to an MP4
+    already rendered into videos_dir, so a repeated reply skips the
+    Gooey.ai round trip.
+
+    Entries are recorded in an index file (lipsync_index.json) next to the
+    videos, rewritten atomically when an entry is added or evicted (and by
+    flush()). Hits only update last_used in memory, so the hit path does
+    no file I/O. Once the cached videos exceed max_bytes or max_entries,
+    the least recently used are deleted. Entries whose file has gone
+    missing are dropped on lookup.
+    """
+
+    def __init__(self, videos_dir=DEFAULT_VIDEOS_DIR, max_bytes=500 * 1024 * 1024, max_entries=500):
+        self.videos_dir = videos_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.index_path = os.path.join(videos_dir, INDEX_FILENAME)
+        os.makedirs(videos_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        self._avatar_hashes = {}
+        self.entries = self._load_index()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_index(self):
+        # Called with self._lock held
+        temp_path = f'{self.index_path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(temp_path, self.index_path)
+        self._dirty = False
+
+    def flush(self):
+        """Writes out last_used times and dropped entries not yet saved."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def avatar_hash(self, avatar_path):
+        """sha256 of the avatar image, recomputed only when the file changes."""
+        stat = os.stat(avatar_path)
+        signature = (avatar_path, stat.st_mtime, stat.st_size)
+        digest = self._avatar_hashes.get(signature)
+        if digest is None:
+            with open(avatar_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._avatar_hashes[signature] = digest
+        return digest
+
+    @staticmethod
+    def key(text, voice, model, avatar_hash):
+        return hashlib.sha256('\0'.join((voice, model, avatar_hash, text)).encode('utf-8')).hexdigest()
+
+    def filename_for(self, key):
+        return f'lipsync_{key[:24]}.mp4'
+
+    def get(self, key):
+        """Returns the cached video's filename, or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(os.path.join(self.videos_dir, entry['filename'])):
+                del self.entries[key]
+                self._dirty = True
+                return None
+            entry['last_used'] = time.time()
+            self._dirty = True
+            return entry['filename']
+
+    def put(self, key, filename, text):
+        """Records a video rendered into videos_dir, then evicts down to the limits."""
+        size = os.path.getsize(os.path.join(self.videos_dir, filename))
+        with self._lock:
+            self.entries[key] = {'filename': filename, 'text': text, 'bytes': size, 'last_used': time.time()}
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        # Called with self._lock held
+        total = sum(entry['bytes'] for entry in self.entries.values())
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes and len(self.entries) <= self.max_entries:
+                break
+            try:
+                os.remove(os.path.join(self.videos_dir, entry['filename']))
+            except FileNotFoundError:
+                pass
+            total -= entry['bytes']
+            del self.entries[key]
+
+    def get_or_render(self, text, voice, model, avatar_path, render):
+        """
+        Returns the filename of the video for text spoken by voice with the
+        TTS model, calling
+        render(filename) to produce it in videos_dir on a miss. render
+        returns the filename it wrote, or None on failure. Concurrent
+        misses for the same key render once.
+        """
+        key = self.key(text, voice, model, self.avatar_hash(avatar_path))
+        filename = self.get(key)
+        if filename is not None:
+            self.hits += 1
+            return filename
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        with render_lock:
+            filename = self.get(key)
+            if filename is not None:
+                self.hits += 1
+                return filename
+            self.misses += 1
+            filename = render(self.filename_for(key))
+            if filename is not None:
+                self.put(key, filename, text)
+            with self._lock:
+                self._render_locks.pop(key, None)
+            return filename
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': sum(entry['bytes'] for entry in self.entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['prewarm', 'stats'])
+    parser.add_argument('--phrases', help='file with one phrase per line (default: built-in stock replies)')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        cache = LipsyncCache()
+        print(json.dumps(cache.stats(), indent=2))
+        for entry in sorted(cache.entries.values(), key=lambda entry: -entry['last_used']):
+            print(f"{entry['filename']}  {entry['bytes'] / 1e6:6.2f} MB  {entry['text']}")
+        return
+
+    phrases = STOCK_PHRASES
+    if args.phrases:
+        with open(args.phrases) as f:
+            phrases = [line.strip() for line in f if line.strip()]
+
+    # Run as a script, so this directory is on sys.path
+    from voice import generate_lipsync_video, lipsync_cache
+    for phrase in phrases:
+        start = time.time()
+        filename = generate_lipsync_video(phrase)
+        print(f"{time.time() - start:6.1f}s  {filename}  {phrase}")
+    lipsync_cache.flush()
+    print(json.dumps(lipsync_cache.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,11 @@ from elevenlabs import set_api_key
 from dotenv import load_dotenv
 import os
 
+try:
+    from .context import ConversationContext
+except ImportError:
+    from context import ConversationContext
+
 # Load environment variables
 load_dotenv()
 
@@ -22,10 +27,12 @@ set_api_key(ELEVENLABS_API_KEY)
 # Initialize Gemini model
 model = genai.GenerativeModel('gemini-1.5-flash')
 
-# Context window to keep track of conversation
-conversation_history = [
-    {"role": "assistant", "content": "You are a friendly and natural-sounding AI assistant. Keep responses simple and engaging, like a human conversation."}
-]
+# Bounded context window to keep track of conversation; older turns slide out
+conversation_context = ConversationContext(
+    "You are a friendly and natural-sounding AI assistant. Keep responses simple and engaging, like a human conversation.",
+    token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '1000')),
+    max_messages=int(os.getenv('CONTEXT_MAX_MESSAGES', '20')),
+)
 
 def transcribe_speech_to_text():
     """
@@ -50,25 +57,26 @@ def transcribe_speech_to_text():
         return None
 
 
-def get_gemini_chat_response(prompt):
+def get_gemini_chat_response(prompt, context=None):
     """
     Sends a prompt to Gemini API and returns a human-like response.
     """
-    global conversation_history
+    if context is None:
+        context = conversation_context
 
-    # Add the new user message to conversation history
-    conversation_history.append({"role": "user", "content": prompt})
+    # Add the new user message to the conversation context
+    context.add_user(prompt)
 
     try:
         # Create the chat request
         response = model.generate_content([
-            {"text": msg["content"]} for msg in conversation_history
+            {"text": msg["content"]} for msg in context.messages()
         ])
 
         ai_response = response.text.strip()
 
-        # Add AI response to conversation history
-        conversation_history.append({"role": "assistant", "content": ai_response})
+        # Add AI response to the conversation context
+        context.add_assistant(ai_response)
 
         return ai_response
     except Exception as e:
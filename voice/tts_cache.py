@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tts_cache')
+
+
+class ElevenLabsProvider:
+    """Synthesizes speech with the ElevenLabs generate() API."""
+
+    def __init__(self, voice="Eric", model="eleven_flash_v2_5"):
+        self.voice = voice
+        self.model = model
+
+    def synthesize(self, text):
+        from elevenlabs import generate
+        return generate(text=text, voice=self.voice, model=self.model)
+
+
+class FakeTTSProvider:
+    """
+    Offline stand-in for ElevenLabsProvider: sleeps for latency seconds and
+    returns deterministic fake audio bytes for the text.
+    """
+
+    def __init__(self, voice="fake", model="fake", latency=0.3, bytes_per_char=400):
+        self.voice = voice
+        self.model = model
+        self.latency = latency
+        self.bytes_per_char = bytes_per_char
+        self.calls = 0
+
+    def synthesize(self, text):
+        self.calls += 1
+        time.sleep(self.latency)
+        seed = hashlib.sha256(text.encode('utf-8')).digest()
+        return (seed * (len(text) * self.bytes_per_char // len(seed) + 1))[:len(text) * self.bytes_per_char]
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech, keyed by (text, voice,
+    model), so each utterance is synthesized at most once.
+
+    Lookups go through an in-memory LRU of up to memory_items clips, then
+    a directory of <key>.mp3 files. On a miss the provider synthesizes the
+    clip and it is written to both tiers. The disk tier is evicted
+    least-recently-used first (by file mtime, refreshed on every hit)
+    once it grows past max_disk_bytes. Concurrent requests for the same
+    clip wait for a single synthesis.
+    """
+
+    def __init__(self, provider, cache_dir=DEFAULT_CACHE_DIR, memory_items=64, max_disk_bytes=50 * 1024 * 1024):
+        self.provider = provider
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.synthesis_seconds = 0.0
+
+    def key(self, text):
+        identity = '\0'.join((self.provider.voice, self.provider.model, text))
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.mp3')
+
+    def _remember(self, key, audio):
+        # Called with self._lock held
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return audio
+
+    def _write_disk(self, key, audio):
+        path = self._path(key)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp3'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get(self, text):
+        """Returns the audio for text, synthesizing it only if neither tier has it."""
+        key = self.key(text)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # Another thread may have filled it while we waited
+                with self._lock:
+                    audio = self._memory.get(key)
+                    if audio is not None:
+                        self.memory_hits += 1
+                        return audio
+                audio = self._read_disk(key)
+                if audio is not None:
+                    with self._lock:
+                        self.disk_hits += 1
+                        self._remember(key, audio)
+                    return audio
+
+                start = time.perf_counter()
+                audio = self.provider.synthesize(text)
+                elapsed = time.perf_counter() - start
+                self._write_disk(key, audio)
+                with self._lock:
+                    self.misses += 1
+                    self.synthesis_seconds += elapsed
+                    self._remember(key, audio)
+                return audio
+            finally:
+                # Also on failure, or the lock would stay in _key_locks for good
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'lookups': lookups,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+                'synthesis_seconds': self.synthesis_seconds,
+            }
@@ -1,3 +1,4 @@
+import atexit
 import os
 import time
 import json
@@ -8,7 +9,18 @@ import tempfile
 from urllib.request import urlretrieve
 
 from dotenv import load_dotenv
-from elevenlabs import generate, set_api_key, play
+from elevenlabs import set_api_key, play
+
+# Imported both as part of the voice package and as a top-level module
+# (server/app.py puts this directory on sys.path)
+try:
+    from .context import ConversationContext
+    from .lipsync_cache import LipsyncCache
+    from .tts_cache import DEFAULT_CACHE_DIR, ElevenLabsProvider, TTSCache
+except ImportError:
+    from context import ConversationContext
+    from lipsync_cache import LipsyncCache
+    from tts_cache import DEFAULT_CACHE_DIR, ElevenLabsProvider, TTSCache
 
 # Gemini imports
 import google.generativeai as genai
@@ -41,14 +53,61 @@ generation_config = {
 
 # ElevenLabs config
 set_api_key(ELEVENLABS_API_KEY)
+TTS_VOICE = "Eric"
+TTS_MODEL = "eleven_flash_v2_5"
+
+# Every reply is synthesized at most once, across calls and restarts
+tts_cache = TTSCache(
+    ElevenLabsProvider(TTS_VOICE, TTS_MODEL),
+    cache_dir=os.getenv('TTS_CACHE_DIR', DEFAULT_CACHE_DIR),
+    memory_items=int(os.getenv('TTS_CACHE_ITEMS', '64')),
+    max_disk_bytes=int(os.getenv('TTS_CACHE_MB', '50')) * 1024 * 1024,
+)
+
+# Rendered lip-sync videos, keyed by reply text, voice and avatar
+VIDEOS_DIR = os.path.join(os.path.dirname(__file__), '..', 'server', 'static', 'videos')
+AVATAR_PATH = os.path.join(os.path.dirname(__file__), 'avatar.png')
+lipsync_cache = LipsyncCache(
+    VIDEOS_DIR,
+    max_bytes=int(os.getenv('LIPSYNC_CACHE_MB', '500')) * 1024 * 1024,
+)
+# Hits only bump last_used in memory; save them on the way out
+atexit.register(lipsync_cache.flush)
 
 # -------------------------------------------------------------------
 # 2. MAINTAIN CONVERSATION HISTORY
 # -------------------------------------------------------------------
-# We initialize this with a "role=assistant" so Gemini knows it's playing the role of a friendly AI.
-conversation_history = [
-    {"role": "assistant", "content": "You are a friendly and natural-sounding AI assistant. Keep responses simple and engaging, like a human conversation."}
-]
+# The context starts with a "role=assistant" system prompt so Gemini knows it's playing the role of a friendly AI.
+SYSTEM_PROMPT = "You are a friendly and natural-sounding AI assistant. Keep responses simple and engaging, like a human conversation."
+
+def summarize_with_gemini(previous_summary, messages):
+    """Folds messages that fell out of the context window into the rolling summary."""
+    transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+    prompt = (
+        "Update this summary of a conversation with the new messages. "
+        "Keep names, requests and facts; answer in under 60 words.\n"
+        f"Summary so far: {previous_summary or '(none)'}\n"
+        f"New messages:\n{transcript}"
+    )
+    response = model.generate_content(prompt, generation_config={"temperature": 0.2, "max_output_tokens": 120})
+    return response.text.strip()
+
+def new_conversation_context():
+    """
+    A bounded per-session context. CONTEXT_TOKEN_BUDGET and
+    CONTEXT_MAX_MESSAGES size the window; CONTEXT_SUMMARIZE=1 keeps a
+    rolling Gemini summary, made in the background, of the turns that
+    fall out of it.
+    """
+    return ConversationContext(
+        SYSTEM_PROMPT,
+        token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', '1000')),
+        max_messages=int(os.getenv('CONTEXT_MAX_MESSAGES', '20')),
+        summarize=summarize_with_gemini if os.getenv('CONTEXT_SUMMARIZE') == '1' else None,
+    )
+
+# Used when no per-session context is passed in
+conversation_context = new_conversation_context()
 
 # -------------------------------------------------------------------
 # 3. CAPTURE SPEECH FROM MICROPHONE
@@ -74,20 +133,22 @@ def transcribe_speech_to_text():
 # -------------------------------------------------------------------
 # 4. GET A RESPONSE FROM GEMINI
 # -------------------------------------------------------------------
-def get_gemini_chat_response(prompt):
+def get_gemini_chat_response(prompt, context=None):
     """
-    Sends user prompt to Gemini, appends the response to conversation_history,
-    and returns a concise AI-generated text limited to 12 words.
+    Sends user prompt to Gemini with the session's bounded context, appends
+    the response to it, and returns a concise AI-generated text limited to
+    12 words. context defaults to the module-wide conversation_context.
     """
-    global conversation_history
+    if context is None:
+        context = conversation_context
 
     # Add user's latest message
-    conversation_history.append({"role": "user", "content": prompt})
+    context.add_user(prompt)
 
     try:
         # Add instruction for concise response
         messages = [
-            {"text": msg["content"]} for msg in conversation_history
+            {"text": msg["content"]} for msg in context.messages()
         ]
         messages.append({"text": "Please give a very helpful, human-like response in under 12 words."}
         )
@@ -99,8 +160,8 @@ def get_gemini_chat_response(prompt):
 
         ai_response = response.text.strip()
 
-        # Add AI's reply to conversation history
-        conversation_history.append({"role": "assistant", "content": ai_response})
+        # Add AI's reply to the conversation context
+        context.add_assistant(ai_response)
 
         return ai_response
 
@@ -109,25 +170,48 @@ def get_gemini_chat_response(prompt):
         return "I encountered an error. Please try again."
 
 # -------------------------------------------------------------------
-# 5. GENERATE LIP-SYNCED VIDEO (MP4) WITH AUDIO (Gooey.ai)
+# 5. TEXT TO SPEECH (ElevenLabs)
 # -------------------------------------------------------------------
-def generate_lipsync_video(text):
+def synthesize_speech(text):
     """
-    1. Uses ElevenLabs to create TTS audio.
-    2. Sends audio + 'avatar.png' to Gooey.ai to produce a lip-synced MP4.
-    3. Returns the local path to that MP4.
+    Returns TTS audio bytes for text, from the TTS cache or freshly
+    generated with ElevenLabs. speak_text() and generate_lipsync_video()
+    both go through here, so a reply is synthesized once even when they
+    aren't handed the same audio.
+    """
+    return tts_cache.get(text)
+
+# -------------------------------------------------------------------
+# 6. GENERATE LIP-SYNCED VIDEO (MP4) WITH AUDIO (Gooey.ai)
+# -------------------------------------------------------------------
+def generate_lipsync_video(text, audio=None):
+    """
+    Returns the filename (under server/static/videos) of a lip-synced MP4
+    of text, straight from the lip-sync cache if this reply was rendered
+    before with the same voice, TTS model and avatar, otherwise rendered
+    with Gooey.ai. Returns None on failure.
     """
     try:
-        # 5.1 Generate TTS audio with ElevenLabs
-        print("Generating TTS audio...")
-        audio_data = generate(
-            text=text,
-            voice="Eric",
-            model="eleven_flash_v2_5"
+        return lipsync_cache.get_or_render(
+            text, TTS_VOICE, TTS_MODEL, AVATAR_PATH,
+            lambda mp4_filename: render_lipsync_video(text, audio, mp4_filename)
         )
+    except Exception as e:
+        print(f"Error generating lip-sync video: {e}")
+        return None
+
+def render_lipsync_video(text, audio=None, mp4_filename=None):
+    """
+    1. Uses ElevenLabs to create TTS audio, unless audio is given.
+    2. Sends audio + 'avatar.png' to Gooey.ai to produce a lip-synced MP4.
+    3. Returns the filename of that MP4 under server/static/videos.
+    """
+    try:
+        # 6.1 Generate TTS audio with ElevenLabs
+        audio_data = audio if audio is not None else synthesize_speech(text)
 
         # Create static/videos directory if it doesn't exist
-        static_dir = os.path.join(os.path.dirname(__file__), '..', 'server', 'static', 'videos')
+        static_dir = VIDEOS_DIR
         os.makedirs(static_dir, exist_ok=True)
 
         # Save audio temporarily
@@ -135,9 +219,9 @@ def generate_lipsync_video(text):
             audio_path = temp_wav.name
             temp_wav.write(audio_data)
 
-        # 5.2 Call Gooey.ai to produce lip-synced video
+        # 6.2 Call Gooey.ai to produce lip-synced video
         print("Calling Gooey.ai Lipsync to produce MP4...")
-        avatar_path = os.path.join(os.path.dirname(__file__), 'avatar.png')
+        avatar_path = AVATAR_PATH
         with open(audio_path, "rb") as audio_file, open(avatar_path, "rb") as face_file:
             files = {
                 "json": (None, json.dumps({}), "application/json"),
@@ -151,14 +235,15 @@ def generate_lipsync_video(text):
             )
             response.raise_for_status()
 
-        # 5.3 Parse response and download the resulting MP4
+        # 6.3 Parse response and download the resulting MP4
         result = response.json()
         mp4_url = result["output"]["output_video"]
         print(f"Lip-sync MP4 URL: {mp4_url}")
 
         # Save to static directory with timestamp to avoid conflicts
-        timestamp = int(time.time())
-        mp4_filename = f'video_{timestamp}.mp4'
+        if mp4_filename is None:
+            timestamp = int(time.time())
+            mp4_filename = f'video_{timestamp}.mp4'
         mp4_path = os.path.join(static_dir, mp4_filename)
         urlretrieve(mp4_url, mp4_path)
         
@@ -173,7 +258,7 @@ def generate_lipsync_video(text):
         return None
 
 # -------------------------------------------------------------------
-# 6. PLAY THE MP4 WITH ITS OWN AUDIO
+# 7. PLAY THE MP4 WITH ITS OWN AUDIO
 # -------------------------------------------------------------------
 def play_mp4_with_default_player(mp4_path):
     """
@@ -213,22 +298,21 @@ def play_mp4_with_default_player(mp4_path):
 
 # Add this function to voice.py (around line 43, after setting ElevenLabs config)
 
-def speak_text(text):
+def speak_text(text, audio=None):
     """
     Uses ElevenLabs API to generate a more human-like voice response.
+    Plays audio instead if it was already synthesized for text.
     """
     try:
-        audio = generate(
-            text=text,
-            voice="Eric",  # Using Eric to match the lip-sync voice
-            model="eleven_flash_v2_5"
-        )
+        if audio is None:
+            # Same voice as the lip-sync video
+            audio = synthesize_speech(text)
         play(audio)
     except Exception as e:
         print(f"Error using ElevenLabs API: {e}")
 
 # -------------------------------------------------------------------
-# 7. MAIN LOGIC: CAPTURE SPEECH -> GEMINI -> LIPSYNC MP4 -> PLAY
+# 8. MAIN LOGIC: CAPTURE SPEECH -> GEMINI -> LIPSYNC MP4 -> PLAY
 # -------------------------------------------------------------------
 def main():
     print("AI Lip-Sync Demo (Gemini) Started!")